@@ -10,7 +10,7 @@ class Settings(BaseSettings):
     langsmith_api_key: str
     langsmith_tracing: bool = True
     langsmith_endpoint: str = "https://api.smith.langchain.com"
-    langsmith_project: str
+    langsmith_project: str = "default"
 
     openai_api_key: str = ""
     google_api_key: str
@@ -20,19 +20,86 @@ class Settings(BaseSettings):
     data_dir: Path = project_root / "data"
     documents_dir: Path = data_dir / "documents"
     embeddings_dir: Path = data_dir / "embeddings"
+    disorder_aliases_path: Path = data_dir / "knowledge" / "disorder_aliases.json"  # Vietnamese/English names per disorder
     logs_dir: Path = project_root / "logs"
 
     # Model settings
-    embedding_model: str = "models/gemini-embedding-001"
+    embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # see src/rag/embeddings/registry.py
     chat_model: str = "gemini-2.5-flash-lite"
+    embedding_cache_path: str = ".data/embeddings/embedding_cache.sqlite3"  # "" disables the cache
+    embedding_backend: str = "torch"  # torch | onnx | onnx-int8 (sentence-transformers models)
+    onnx_model_dir: str = ".data/models/onnx"
+    embedding_server_url: str = ""  # e.g. unix:///tmp/rag-embeddings.sock; "" = load the model in-process
 
     # Vector store
-    vector_store_collection: str = "example_collection"
-    vector_store_persist_dir: str = "./chroma_langchain_db"
+    vector_store_collection: str = "psychology_knowledge_base"  # suffixed with the embedding model
+    vector_store_persist_dir: str = ".data/embeddings/chroma_langchain_db"
+
+    # Retrieval
+    retrieval_k: int = 2
+    query_cache_size: int = 1024  # entries per query cache, 0 disables
+    query_cache_ttl: float = 0  # seconds, 0 = no expiry
+    retrieval_workers: int = 4  # threads for query encoding and vector search
+    retrieval_max_queue: int = 64  # waiting searches before new ones are rejected
+    query_batch_window_ms: float = 5  # coalescing window for query embeddings, 0 disables
+    query_max_batch: int = 32
+    retrieval_hybrid: bool = True  # fuse BM25 with vector search
+    hybrid_candidates: int = 20  # candidates per retriever before fusion
+    rrf_k: int = 60  # reciprocal-rank fusion constant
+    context_token_budget: int = 1200  # tokens of retrieved context per retrieve_context call
+    context_tokenizer: str = "o200k_base"  # tiktoken encoding used to count them
+    retrieve_many_max_queries: int = 5  # queries searched per retrieve_many call
+    retrieve_many_token_budget: int = 2400  # tokens of merged context per retrieve_many call
+    parent_retrieval: bool = True  # return a hit's parent section (structured chunker only)
+    parent_max_bytes: int = 6000  # larger parents are returned as the matching chunk
+    dense_index: str = "flat"  # flat (exact NumPy search, memory-mapped) | chroma (HNSW)
+    dense_index_dtype: str = "float32"  # float32 | float16
+    mmr_enabled: bool = True  # pick the final k by maximal marginal relevance (skips near-duplicate chunks)
+    mmr_lambda: float = 0.5  # 1 = relevance only, 0 = diversity only
+    mmr_candidates: int = 20  # candidates MMR selects from
+    prefetch_enabled: bool = True  # retrieve for each user message while the model runs
+    prefetch_similarity: float = 0.8  # min query cosine similarity for retrieve_context to reuse a prefetch
+    prefetch_max_entries: int = 4  # prefetches kept per conversation
+    disorder_cards: bool = True  # precomputed per-disorder criteria for lookup_disorder (structured chunker only)
+
+    # Cross-encoder reranking (opt-in)
+    rerank_enabled: bool = False
+    # Multilingual (mMARCO) so Vietnamese queries are scored; the English-only
+    # cross-encoder/ms-marco-MiniLM-L-6-v2 is about twice as fast but ranks Vietnamese poorly
+    rerank_model: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    rerank_backend: str = "torch"  # torch | onnx | onnx-int8
+    rerank_candidates: int = 20  # first-stage candidates scored by the cross-encoder
+    rerank_batch_size: int = 32
+    # Skip reranking when a search would exceed this, 0 = no limit. Not measured for the
+    # L12 default: tune it per host from the reranking avg_ms in RetrievalService.stats()
+    # (rerank_candidates pairs per pass), or it may skip most searches on a slow CPU
+    rerank_budget_ms: float = 250
+    rerank_probe_every: int = 20  # skipped searches before one is reranked anyway to re-measure
+
+    # Semantic cache for first-turn replies (opt-in)
+    response_cache_enabled: bool = False
+    response_cache_threshold: float = 0.95  # minimum cosine similarity for a hit
+    response_cache_size: int = 256
+    response_cache_ttl: float = 86400  # seconds, 0 = no expiry
+
+    # Ingestion
+    text_normalization: bool = True  # NFC + consistent Vietnamese tone marks for chunks (queries always)
+    chunking_method: str = "structured"  # structured (headings/criteria lists, token-bounded) | recursive
+    chunk_max_tokens: int = 256  # structured
+    chunk_min_tokens: int = 32  # structured
+    chunk_tokenizer: str = "o200k_base"  # structured; tiktoken encoding or Hugging Face model name
+    chunk_size: int = 1000  # recursive, characters
+    chunk_overlap: int = 200  # recursive, characters
+    ingest_workers: int = 0  # 0 = one worker process per CPU
+    # At most high_water_mark parsed chunks plus two write batches (one being
+    # embedded, one being upserted) are held in memory while ingesting
+    ingest_high_water_mark: int = 256  # max chunks buffered between parsing and embedding
+    ingest_batch_size: int = 0  # chunks per embed/upsert batch; 0 = ingest_high_water_mark (capped at Chroma's max)
 
     class Config:
         env_file = ".env"
         case_sensitive = False
+        extra = "ignore"
 
 
 def get_settings() -> Settings:
@@ -5,7 +5,9 @@ to provide psychology-informed support and analysis.
 """
 
 import os
+import re
 import sys
+import asyncio
 import uuid
 import logging
 import json
@@ -18,17 +20,13 @@ import chainlit as cl
 from pydantic import BaseModel, Field
 import httpx  # Add this for HTTP requests
 
-# LangChain imports
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.agents import create_agent, AgentState
+# LangChain imports (heavy model/vector store imports are deferred to the
+# component factories below so the module imports quickly)
+from langchain.agents import AgentState
 from langchain.tools import tool, ToolRuntime
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.types import Command
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
 # ============================================================================
 # CONFIGURATION & INITIALIZATION
@@ -42,6 +40,9 @@ project_root = Path.cwd()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from config.settings import get_settings
+from src.rag.registry import ComponentRegistry
+
 # Verify required environment variables
 LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -51,73 +52,238 @@ if not LANGSMITH_API_KEY:
 if not GOOGLE_API_KEY:
     raise EnvironmentError("GOOGLE_API_KEY not set in environment. Add it to your .env file.")
 
+settings = get_settings()
+
 print("✓ Environment variables loaded successfully")
 
+# SETUP LOGGING
+
+Path(".logs").mkdir(exist_ok=True)
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('.logs/app.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
 # ============================================================================
-# INITIALIZE RAG COMPONENTS
+# RAG COMPONENTS (constructed lazily)
 # ============================================================================
 
-print("Initializing RAG components...")
+# Components are built on first use or by the background warm-up that
+# on_chat_start kicks off, so importing this module stays fast.
+components = ComponentRegistry()
 
-# Initialize embeddings (HuggingFace)
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-print("✓ Embeddings initialized")
 
-# Initialize chat model (Google Gemini)
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite")
-print("✓ Chat model initialized")
 
-# Initialize vector store (Chroma)
-vector_store = Chroma(
-    collection_name="psychology_knowledge_base",
-    embedding_function=embeddings,
-    persist_directory=".data/embeddings/chroma_langchain_db",
-)
-print("✓ Vector store initialized")
+def create_embeddings():
+    """Initialize embeddings (Settings.embedding_model on the configured backend)."""
+    from src.rag.embeddings.vectorstore import initialize_embeddings
+    return initialize_embeddings(
+        settings.embedding_model,
+        cache_path=settings.embedding_cache_path or None,
+        backend=settings.embedding_backend,
+        onnx_dir=settings.onnx_model_dir,
+        server_url=settings.embedding_server_url or None,
+    )
+
+
+def create_chat_model():
+    """Initialize chat model (Google Gemini)."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite")
+
+
+def create_vector_store():
+    """Initialize vector store (Chroma), one collection per embedding model."""
+    from src.rag.embeddings.vectorstore import initialize_vector_store
+    return initialize_vector_store(
+        components.get("embeddings"),
+        collection_name=settings.vector_store_collection,
+        persist_directory=settings.vector_store_persist_dir,
+        embedding_model=settings.embedding_model,
+    )
+
+
+def create_dense_index():
+    """Load the flat NumPy mirror of the collection used for exact vector search."""
+    if settings.dense_index != "flat":
+        return None
+    from src.rag.retrievers.flat_index import flat_index_path_for, load_or_build_flat_index
+    vector_store = components.get("vector_store")
+    stats = components.get("document_index")
+    return load_or_build_flat_index(
+        vector_store,
+        flat_index_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+        dtype=settings.dense_index_dtype,
+        rebuild=bool(stats and stats.changed),
+    )
+
+
+def create_reranker():
+    """Load the cross-encoder reranker, if enabled."""
+    if not settings.rerank_enabled:
+        return None
+    from src.rag.retrievers.reranker import create_reranker as load_reranker
+    return load_reranker(
+        settings.rerank_model,
+        backend=settings.rerank_backend,
+        onnx_dir=settings.onnx_model_dir,
+        batch_size=settings.rerank_batch_size,
+    )
+
+
+def create_section_index():
+    """Load the chapter/section/disorder-code index used for filtered retrieval."""
+    from src.rag.retrievers.filters import load_or_build_section_index, section_index_path_for
+    vector_store = components.get("vector_store")
+    stats = components.get("document_index")
+    return load_or_build_section_index(
+        vector_store,
+        section_index_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+        rebuild=bool(stats and stats.changed),
+    )
+
+
+def create_parent_store():
+    """Open the parent-section store used for small-to-big retrieval, if enabled."""
+    if not settings.parent_retrieval:
+        return None
+    from src.rag.retrievers.parents import load_or_build_parent_store, parent_store_path_for
+    vector_store = components.get("vector_store")
+    stats = components.get("document_index")
+    return load_or_build_parent_store(
+        vector_store,
+        parent_store_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+        rebuild=bool(stats and stats.changed),
+    )
+
+
+def create_disorder_cards():
+    """Load the precomputed disorder cards used by lookup_disorder, if enabled."""
+    if not settings.disorder_cards:
+        return None
+    from src.rag.retrievers.cards import disorder_cards_path_for, load_or_build_disorder_cards
+    vector_store = components.get("vector_store")
+    stats = components.get("document_index")
+    return load_or_build_disorder_cards(
+        vector_store,
+        disorder_cards_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+        aliases_path=settings.disorder_aliases_path,
+        rebuild=bool(stats and stats.changed),
+    )
+
+
+def create_retriever():
+    """Initialize the retrieval service with its query caches and worker pool."""
+    from src.rag.embeddings.registry import get_embedding_spec
+    from src.rag.retrievers.executor import RetrievalExecutor
+    from src.rag.retrievers.service import RetrievalService
+    return RetrievalService(
+        components.get("vector_store"),
+        model_spec=get_embedding_spec(settings.embedding_model),
+        k=settings.retrieval_k,
+        cache_size=settings.query_cache_size,
+        cache_ttl=settings.query_cache_ttl or None,
+        executor=RetrievalExecutor(settings.retrieval_workers, settings.retrieval_max_queue),
+        batch_window=settings.query_batch_window_ms / 1000,
+        max_batch=settings.query_max_batch,
+        sparse_index=components.get("sparse_index"),
+        hybrid_candidates=settings.hybrid_candidates,
+        rrf_k=settings.rrf_k,
+        dense_index=components.get("dense_index"),
+        reranker=components.get("reranker"),
+        rerank_candidates=settings.rerank_candidates,
+        rerank_budget=settings.rerank_budget_ms / 1000 if settings.rerank_budget_ms else None,
+        rerank_probe_every=settings.rerank_probe_every,
+        section_index=components.get("section_index"),
+        parent_store=components.get("parent_store"),
+        parent_max_bytes=settings.parent_max_bytes,
+        mmr_lambda=settings.mmr_lambda if settings.mmr_enabled else None,
+        mmr_candidates=settings.mmr_candidates,
+    )
+
+
+def create_context_builder():
+    """Initialize the token-budgeted context builder for retrieve_context."""
+    from src.rag.retrievers.context import ContextBuilder
+    return ContextBuilder(token_budget=settings.context_token_budget, encoding=settings.context_tokenizer)
+
+
+def create_response_cache():
+    """Initialize the semantic first-turn response cache, if enabled."""
+    if not settings.response_cache_enabled:
+        return None
+    from src.rag.agents.response_cache import SemanticResponseCache
+    return SemanticResponseCache(
+        components.get("embeddings"),
+        threshold=settings.response_cache_threshold,
+        max_entries=settings.response_cache_size,
+        ttl=settings.response_cache_ttl or None,
+    )
 
 # ============================================================================
 # LOAD AND INDEX DOCUMENTS
 # ============================================================================
 
 def load_and_index_documents():
-    """Load PDF documents and index them into the vector store."""
-    pdf_path = Path("data/documents/DSM-5 Các tiêu chuẩn chẩn đoán.pdf")
+    """Load every document under the documents directory and sync it into the vector store.
+
+    Returns the run's IndexStats, or None if indexing failed.
+    """
+    from src.rag.indexing.indexer import index_documents
+    from src.rag.indexing.manifest import manifest_path_for
+    from src.rag.loaders.chunking import ChunkingConfig
+    from src.rag.loaders.directory_loader import discover_documents
+
+    vector_store = components.get("vector_store")
+    paths = discover_documents(settings.documents_dir)
     
-    if not pdf_path.exists():
-        print(f"⚠ Warning: PDF not found at {pdf_path}")
+    if not paths:
+        print(f"⚠ Warning: no documents found in {settings.documents_dir}")
         print("Using empty vector store. Add documents manually or provide the PDF file.")
-        return
-    
-    # Check if documents already indexed
-    collection_count = vector_store._collection.count()
-    if collection_count > 0:
-        print(f"✓ Documents already indexed ({collection_count} chunks in vector store)")
-        print("✓ Skipping re-indexing (pass)")
-        return
-    
-    print(f"Loading documents from {pdf_path}...")
     
     try:
-        # Load PDF
-        loader = PyPDFLoader(str(pdf_path))
-        docs = loader.load()
-        print(f"✓ Loaded {len(docs)} pages")
-        
-        # Split into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            add_start_index=True,
+        # Only new or changed chunks are embedded; see the manifest next to the store
+        stats = index_documents(
+            vector_store,
+            paths,
+            manifest_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+            chunking=ChunkingConfig.from_settings(settings),
+            max_workers=settings.ingest_workers or None,
+            high_water_mark=settings.ingest_high_water_mark,
+            batch_size=settings.ingest_batch_size or None,
         )
-        all_splits = text_splitter.split_documents(docs)
-        print(f"✓ Split into {len(all_splits)} chunks")
-        
-        # Add to vector store
-        document_ids = vector_store.add_documents(documents=all_splits)
-        print(f"✓ Indexed {len(document_ids)} documents into vector store")
+        print(
+            f"✓ Index up to date in {stats.seconds:.1f}s "
+            f"({stats.files_scanned} files, {stats.chunks_added} chunks added, "
+            f"{stats.chunks_deleted} deleted, {stats.chunks_unchanged} unchanged, "
+            f"{stats.files_failed} files failed, {stats.chunks_per_second:.1f} chunks/sec)"
+        )
+        return stats
         
     except Exception as e:
         print(f"✗ Error loading documents: {e}")
+        return None
+
+
+def create_sparse_index():
+    """Load the BM25 index for hybrid retrieval, rebuilding it when indexing changed the store."""
+    if not settings.retrieval_hybrid:
+        return None
+    from src.rag.retrievers.bm25 import bm25_path_for, load_or_build_bm25
+    vector_store = components.get("vector_store")
+    stats = components.get("document_index")
+    return load_or_build_bm25(
+        vector_store,
+        bm25_path_for(settings.vector_store_persist_dir, vector_store._collection.name),
+        rebuild=bool(stats and stats.changed),
+    )
 
 # ============================================================================
 # CHAT HISTORY PERSISTENCE
@@ -167,24 +333,6 @@ def load_chat_history(user_id: str, thread_id: str) -> tuple:
     
     return [], {}
 
-# Load documents on startup
-load_and_index_documents()
-
-# SETUP LOGGING
-
-Path(".logs").mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('.logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
-
-logger = logging.getLogger(__name__)
-
 # ============================================================================
 # DEFINE CUSTOM AGENT STATE
 # ============================================================================
@@ -199,33 +347,127 @@ class PsychologyAgentState(AgentState):
     content: str = ""  # Content/summary of user's state
     total_guess: str = ""  # Total assessment/diagnosis
 
+def get_prefetcher():
+    """Return this conversation's retrieval prefetcher, creating it on first use."""
+    if not settings.prefetch_enabled:
+        return None
+    prefetcher = cl.user_session.get("prefetcher")
+    if prefetcher is None:
+        from src.rag.retrievers.prefetch import RetrievalPrefetcher
+        prefetcher = RetrievalPrefetcher(
+            components.get("retriever"),
+            similarity=settings.prefetch_similarity,
+            max_entries=settings.prefetch_max_entries,
+        )
+        cl.user_session.set("prefetcher", prefetcher)
+    return prefetcher
+
 # ============================================================================
 # DEFINE TOOLS
 # ============================================================================
 
 @tool
-def retrieve_context(query: str) -> str:
+async def retrieve_context(
+    query: str,
+    chapter: Optional[str] = Field(
+        default=None, description="Optional DSM-5 chapter to search in (e.g., 'Depressive Disorders')."
+    ),
+    disorder_code: Optional[str] = Field(
+        default=None, description="Optional ICD-10-CM code to search for (e.g., 'F32.1' or 'F41')."
+    ),
+) -> str:
     """
     Search DSM-5 psychology database for information matching the query.
     Use this to find relevant diagnostic criteria, symptoms, or treatments.
+    Narrow the search with chapter or disorder_code once the likely disorder is known.
     """
-    print(f"[Tool Call: retrieve_context] Query: {query}")
+    print(f"[Tool Call: retrieve_context] Query: {query} (chapter={chapter}, code={disorder_code})")
     
     try:
-        retrieved_docs = vector_store.similarity_search(query, k=2)
+        retriever = components.get("retriever")
+        section_filter = retriever.resolve_filter(chapter, disorder_code)
+        # Reuse the search on_message started for a similar query, if any
+        prefetcher = cl.user_session.get("prefetcher")
+        retrieved_docs = None
+        if prefetcher is not None:
+            retrieved_docs = await prefetcher.match(query, filter=section_filter)
+            logger.debug(f"Prefetch stats: {prefetcher.stats()}")
+        if retrieved_docs is None:
+            # Encoding and search run on the retrieval pool, not the event loop
+            retrieved_docs = await retriever.asearch(query, filter=section_filter)
+        logger.debug(f"Retrieval stats: {retriever.stats()}")
         
         if retrieved_docs:
-            serialized = "\n\n".join(
-                (f"Source: {doc.metadata}\nContent: {doc.page_content[:500]}")
-                for doc in retrieved_docs
-            )
-            return f"Retrieved relevant information:\n\n{serialized}"
+            # Merged, deduplicated passages with short citations, within the token budget
+            context = components.get("context_builder").build(retrieved_docs)
+            return f"Retrieved relevant information:\n\n{context}"
         else:
             return f"No relevant information found for: {query}"
     except Exception as e:
         print(f"Error in retrieve_context: {e}")
         return f"Error retrieving information: {str(e)}"
 
+@tool
+async def retrieve_many(
+    queries: list[str] = Field(
+        description="Related search queries, e.g. the symptoms, their duration and the suspected disorder."
+    ),
+    chapter: Optional[str] = Field(
+        default=None, description="Optional DSM-5 chapter to search in (e.g., 'Depressive Disorders')."
+    ),
+    disorder_code: Optional[str] = Field(
+        default=None, description="Optional ICD-10-CM code to search for (e.g., 'F32.1' or 'F41')."
+    ),
+) -> str:
+    """
+    Search DSM-5 psychology database for several related queries at once.
+    Prefer this over several retrieve_context calls when you need information on more than one aspect.
+    """
+    queries = queries[:settings.retrieve_many_max_queries]
+    print(f"[Tool Call: retrieve_many] Queries: {queries} (chapter={chapter}, code={disorder_code})")
+
+    try:
+        retriever = components.get("retriever")
+        section_filter = retriever.resolve_filter(chapter, disorder_code)
+        # One embedding batch, concurrent searches, fused and deduplicated results
+        retrieved_docs = await retriever.asearch_many(queries, filter=section_filter)
+        logger.debug(f"Retrieval stats: {retriever.stats()}")
+
+        if retrieved_docs:
+            context = components.get("context_builder").build(
+                retrieved_docs, token_budget=settings.retrieve_many_token_budget
+            )
+            return f"Retrieved relevant information:\n\n{context}"
+        else:
+            return f"No relevant information found for: {'; '.join(queries)}"
+    except Exception as e:
+        print(f"Error in retrieve_many: {e}")
+        return f"Error retrieving information: {str(e)}"
+
+@tool
+async def lookup_disorder(
+    name_or_code: str = Field(
+        description="Disorder name in Vietnamese or English, or its ICD-10-CM code (e.g., 'trầm cảm', 'Insomnia Disorder', 'F41.1')."
+    ),
+) -> str:
+    """
+    Look up a disorder's DSM-5 codes and diagnostic criteria directly.
+    Use this when the user's concern maps to a specific disorder; use retrieve_context for anything else.
+    """
+    print(f"[Tool Call: lookup_disorder] {name_or_code}")
+
+    cards = components.get("disorder_cards")
+    if cards is None or not len(cards):
+        return "Disorder cards are not available; use retrieve_context instead."
+    # Dict lookup on the code or folded name: no embedding or vector search
+    card = cards.lookup(name_or_code)
+    if card is not None:
+        return card.render()
+    suggestions = cards.suggest(name_or_code)
+    if suggestions:
+        return f"No unique match for {name_or_code!r}. Did you mean: {', '.join(suggestions)}?"
+    return f"No disorder card for {name_or_code!r}; use retrieve_context instead."
+
 @tool
 def update_diagnosis(
     score: str = Field(description="Score of the user's mental health (e.g., anxiety level 1-10)."),
@@ -270,7 +512,7 @@ def update_diagnosis(
 # CREATE AGENT
 # ============================================================================
 
-tools = [retrieve_context, update_diagnosis]
+tools = [retrieve_context, retrieve_many, update_diagnosis]
 
 checkpointer = InMemorySaver()  
 
@@ -278,19 +520,44 @@ SYSTEM_PROMPT = """
 Bạn là một chuyên gia tâm lý AI chuyên chăm sóc sức khỏe tâm thần.
 
 Bước 1: Thu thập thông tin triệu chứng của người dùng...
-Bước 2: Khi đủ thông tin, dùng retrieve_context, update_diagnosis...
+Bước 2: Khi đủ thông tin, dùng {lookup_disorder}retrieve_context (hoặc retrieve_many để tra cứu nhiều khía cạnh trong một lần gọi), update_diagnosis...
 Bước 3: Đánh giá theo 4 mức độ: kém, trung bình, bình thường, tốt...
 """
+LOOKUP_DISORDER_PROMPT = "lookup_disorder để tra nhanh tiêu chuẩn của một rối loạn cụ thể, "
+
+def create_psychology_agent():
+    """Build the psychology agent once the chat model is available."""
+    from langchain.agents import create_agent
+    agent_tools, lookup_prompt = tools, ""
+    cards = components.get("disorder_cards")
+    if cards is not None and len(cards):
+        # Without cards every lookup_disorder call would be a wasted round trip
+        agent_tools, lookup_prompt = [lookup_disorder, *tools], LOOKUP_DISORDER_PROMPT
+    return create_agent(
+        model=components.get("chat_model"),
+        tools=agent_tools,
+        state_schema=PsychologyAgentState,
+        checkpointer=checkpointer,
+        system_prompt=SYSTEM_PROMPT.format(lookup_disorder=lookup_prompt),
+    )
 
-agent = create_agent(
-    model=model,
-    tools=tools,
-    state_schema=PsychologyAgentState,
-    checkpointer=checkpointer,
-    system_prompt=SYSTEM_PROMPT,
-)
 
-print("✓ Psychology Agent with RAG initialized successfully\n")
+components.register("embeddings", create_embeddings)
+components.register("chat_model", create_chat_model)
+components.register("vector_store", create_vector_store)
+components.register("document_index", load_and_index_documents)
+components.register("sparse_index", create_sparse_index)
+components.register("dense_index", create_dense_index)
+components.register("reranker", create_reranker)
+components.register("section_index", create_section_index)
+components.register("parent_store", create_parent_store)
+components.register("disorder_cards", create_disorder_cards)
+components.register("retriever", create_retriever)
+components.register("context_builder", create_context_builder)
+components.register("response_cache", create_response_cache)
+components.register("agent", create_psychology_agent)
+
+print("✓ Psychology Agent registered (components load in the background)\n")
 
 # ============================================================================
 # CHAINLIT CHAT HANDLERS
@@ -299,6 +566,9 @@ print("✓ Psychology Agent with RAG initialized successfully\n")
 @cl.on_chat_start
 async def on_chat_start():
     """Called when a new user session starts."""
+    # Build models and the index in the background; the first message waits on it
+    components.start_warmup()
+
     # Create unique thread_id for this session
     thread_id = str(uuid.uuid4())
     cl.user_session.set("thread_id", thread_id)
@@ -370,25 +640,64 @@ async def on_message(message: cl.Message):
     await response.send()
     
     try:
-        # Stream agent response - use "values" mode for actual state
-        is_first_token = True
-        async for event in agent.astream(inputs, config, stream_mode="values"):
-            # Get the last message from the agent
-            last_message = event["messages"][-1]
-
-            if last_message.type == "ai":
-                    # Only stream content from AI
-                    if hasattr(last_message, "content") and last_message.content:
-                        if is_first_token:
-                            is_first_token = False
-
-                        await response.stream_token(last_message.content)
-
-                    # Update history with agent
-                    message_history.append({
-                        "role": "assistant",
-                        "content": last_message.content
-                    })
+        # Wait for the background warm-up without blocking other sessions
+        await components.wait_until_ready()
+        agent = components.get("agent")
+
+        # Opt-in: answer near-duplicate opening messages from the semantic cache
+        response_cache = components.get("response_cache") if current_state is None else None
+        cached_reply = None
+        if response_cache is not None:
+            cached_reply = await asyncio.to_thread(response_cache.lookup, message.content)
+
+        if cached_reply is not None:
+            logger.info(f"⚡ Serving cached first-turn reply {response_cache.stats()}")
+            for token in re.findall(r"\S+\s*", cached_reply):
+                await response.stream_token(token)
+
+            # Record the exchange so the agent remembers it on the next turn
+            await agent.aupdate_state(
+                config,
+                {
+                    "messages": [HumanMessage(content=message.content), AIMessage(content=cached_reply)],
+                    "user_id": user_id,
+                },
+                as_node="model",
+            )
+            message_history.append({"role": "assistant", "content": cached_reply})
+        else:
+            # Start retrieving for this message now, so the search overlaps the
+            # first model call instead of following its retrieve_context request
+            prefetcher = get_prefetcher()
+            if prefetcher is not None:
+                from src.rag.retrievers.prefetch import speculative_query
+                prefetcher.start(speculative_query(message_history))
+
+            # Stream agent response - use "values" mode for actual state
+            is_first_token = True
+            final_reply = None
+            async for event in agent.astream(inputs, config, stream_mode="values"):
+                # Get the last message from the agent
+                last_message = event["messages"][-1]
+
+                if last_message.type == "ai":
+                        # Only stream content from AI
+                        if hasattr(last_message, "content") and last_message.content:
+                            if is_first_token:
+                                is_first_token = False
+
+                            await response.stream_token(last_message.content)
+                        if not last_message.tool_calls:
+                            final_reply = last_message.content
+
+                        # Update history with agent
+                        message_history.append({
+                            "role": "assistant",
+                            "content": last_message.content
+                        })
+
+            if response_cache is not None and isinstance(final_reply, str) and final_reply:
+                await asyncio.to_thread(response_cache.add, message.content, final_reply)
 
         print()
 
@@ -475,7 +784,10 @@ async def save_to_backend_api(thread_id: str, message_history: list, diagnosis_d
         logger.error(f"Error in save_to_backend_api: {e}")
 
 @cl.on_chat_end
-def on_chat_end():
+async def on_chat_end():
+    prefetcher = cl.user_session.get("prefetcher")
+    if prefetcher is not None:
+        prefetcher.close()
     print("The user disconnected!")
 
 # ============================================================================
@@ -0,0 +1,126 @@
+"""Semantic cache of first-turn agent replies."""
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.rag.normalize import normalize_text
+
+
+@dataclass
+class CachedResponse:
+    """A cached reply and its bookkeeping."""
+
+    message: str
+    reply: str
+    created_at: float
+    last_used: float
+    hits: int = 0
+
+
+class SemanticResponseCache:
+    """
+    Serve replies to near-duplicate opening messages without calling the model.
+
+    Messages are embedded and compared by cosine similarity against a small
+    in-memory matrix of previously answered first-turn messages. A lookup
+    hits when the best match is at or above ``threshold`` and has not
+    expired. When full, expired entries are dropped first, then the least
+    recently used one.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl: Optional[float] = 86400,
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            embeddings: Embeddings used to compare messages
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached replies
+            ttl: Seconds a reply stays valid, or None for no expiry
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: List[CachedResponse] = []
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dim), unit rows
+        self._lock = threading.Lock()
+
+    def _embed(self, message: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(normalize_text(message)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: CachedResponse, now: float) -> bool:
+        return self.ttl is not None and now - entry.created_at > self.ttl
+
+    def lookup(self, message: str) -> Optional[str]:
+        """
+        Return a cached reply for a message similar enough to a cached one.
+
+        Args:
+            message: First-turn user message
+
+        Returns:
+            Cached reply text, or None on a miss
+        """
+        vector = self._embed(message)
+        now = time.time()
+        with self._lock:
+            if self._entries:
+                scores = self._vectors[:len(self._entries)] @ vector
+                for index in np.argsort(-scores):
+                    if scores[index] < self.threshold:
+                        break
+                    entry = self._entries[index]
+                    if not self._expired(entry, now):
+                        entry.last_used = now
+                        entry.hits += 1
+                        self.hits += 1
+                        return entry.reply
+            self.misses += 1
+            return None
+
+    def add(self, message: str, reply: str) -> None:
+        """
+        Cache the reply given to a first-turn message.
+
+        Args:
+            message: First-turn user message
+            reply: Final assistant reply
+        """
+        vector = self._embed(message)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if len(self._entries) < self.max_entries:
+                index = len(self._entries)
+                self._entries.append(None)
+            else:
+                expired = [i for i, entry in enumerate(self._entries) if self._expired(entry, now)]
+                index = expired[0] if expired else min(
+                    range(len(self._entries)), key=lambda i: self._entries[i].last_used
+                )
+            self._entries[index] = CachedResponse(message, reply, created_at=now, last_used=now)
+            self._vectors[index] = vector
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,131 @@
+"""Dynamic micro-batching of query embeddings across concurrent callers."""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+try:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+except ImportError:  # Gemini embeddings are optional here
+    GoogleGenerativeAIEmbeddings = None
+
+
+def embed_query_batch(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with one model call.
+
+    ``Embeddings`` only has a single-text ``embed_query``; this picks the
+    batched equivalent per backend so asymmetric models still produce query
+    (not document) embeddings.
+
+    Args:
+        embeddings: Embeddings instance
+        texts: Query texts
+
+    Returns:
+        One vector per text
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    if GoogleGenerativeAIEmbeddings is not None and isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    if getattr(embeddings, "query_encode_kwargs", None) == getattr(embeddings, "encode_kwargs", None):
+        # Symmetric sentence-transformers models embed queries and documents alike
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class QueryEmbeddingBatcher:
+    """
+    Coalesce concurrent query embeddings into single forward passes.
+
+    Callers await ``aembed``; texts arriving within ``window`` seconds of the
+    first pending one (or until ``max_batch`` texts are pending) are encoded
+    together and each caller receives its own vector. This is the dynamic
+    batching used by inference servers, applied to our embeddings object.
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        run_in_pool: Callable[..., Awaitable],
+        window: float = 0.005,
+        max_batch: int = 32,
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            embeddings: Embeddings used to encode batches
+            run_in_pool: Coroutine function running ``fn(*args)`` off the
+                event loop, e.g. ``RetrievalExecutor.run``
+            window: Seconds to wait for more texts after the first arrives
+            max_batch: Flush immediately once this many texts are pending
+        """
+        self.embeddings = embeddings
+        self.run_in_pool = run_in_pool
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.texts = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks: hold running encodes here
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def aembed(self, text: str) -> List[float]:
+        """
+        Embed one query, batched with any other queries arriving concurrently.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Query embedding
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        if batch:
+            task = asyncio.ensure_future(self._encode(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = await self.run_in_pool(embed_query_batch, self.embeddings, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(batch)
+        by_text: Dict[str, List[float]] = dict(zip(texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> Dict[str, float]:
+        """Return batch counters."""
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+        }
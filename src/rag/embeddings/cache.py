@@ -0,0 +1,164 @@
+"""Persistent embedding cache backed by SQLite."""
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.rag.embeddings.batching import embed_query_batch
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores every computed vector on disk.
+
+    Vectors are keyed by ``(model_name, kind, sha256(text))`` where ``kind``
+    separates document and query embeddings (asymmetric models such as
+    Gemini embed them differently). Rebuilding a collection or indexing the
+    same text into another store re-uses cached vectors instead of running
+    the model or calling a paid API again. The database uses WAL mode so
+    several worker processes can share it.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        cache_path: str | Path,
+        cache_queries: bool = True,
+    ):
+        """
+        Initialize cached embeddings.
+
+        Args:
+            underlying: Embeddings computing vectors on cache misses
+            model_name: Model identifier used as part of the cache key
+            cache_path: SQLite database file
+            cache_queries: Whether to cache ``embed_query`` results too
+        """
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache_path = Path(cache_path)
+        self.cache_queries = cache_queries
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, kind, hash))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, kind: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(hashes), _LOOKUP_BATCH):
+                batch = hashes[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND kind = ? AND hash IN ({placeholders})",
+                    [self.model_name, kind, *batch],
+                )
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def _store(self, kind: str, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, kind, hash, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_name, kind, key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only the texts not already cached."""
+        hashes = [self._hash(text) for text in texts]
+        found = self._lookup("document", list(dict.fromkeys(hashes)))
+
+        missing = {key: text for key, text in zip(hashes, texts) if key not in found}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store("document", computed)
+            found.update(computed)
+        return [found[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when ``cache_queries`` is enabled."""
+        if not self.cache_queries:
+            return self.underlying.embed_query(text)
+
+        key = self._hash(text)
+        found = self._lookup("query", [key])
+        if key in found:
+            self.hits += 1
+            return found[key]
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._store("query", {key: vector})
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries at once, computing only the uncached ones in one batch."""
+        if not self.cache_queries:
+            return embed_query_batch(self.underlying, texts)
+
+        hashes = [self._hash(text) for text in texts]
+        found = self._lookup("query", list(dict.fromkeys(hashes)))
+        missing = {key: text for key, text in zip(hashes, texts) if key not in found}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            computed = dict(zip(missing.keys(), embed_query_batch(self.underlying, list(missing.values()))))
+            self._store("query", computed)
+            found.update(computed)
+        return [found[key] for key in hashes]
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
+
+
+def with_embedding_cache(
+    embeddings: Embeddings,
+    model_name: str,
+    cache_path: Optional[str | Path],
+) -> Embeddings:
+    """
+    Wrap embeddings in a ``CachedEmbeddings`` when a cache path is configured.
+
+    Args:
+        embeddings: Embeddings to wrap
+        model_name: Model identifier used as part of the cache key
+        cache_path: SQLite database file, or None to disable caching
+
+    Returns:
+        The cached wrapper, or ``embeddings`` unchanged
+    """
+    if not cache_path:
+        return embeddings
+    cached = CachedEmbeddings(embeddings, model_name, cache_path)
+    print(f"✓ Embedding cache enabled: {cached.cache_path}")
+    return cached
@@ -0,0 +1,228 @@
+"""ONNX Runtime backend for sentence-transformers embedding models."""
+import json
+import re
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Embedding backends selectable through Settings.embedding_backend
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+VALIDATION_TEXTS = [
+    "Tôi cảm thấy mệt mỏi và mất ngủ suốt hai tuần nay.",
+    "Rối loạn trầm cảm chủ yếu: khí sắc trầm gần như cả ngày, hầu như mỗi ngày.",
+    "Persistent worry about several events for at least six months.",
+    "Tiêu chuẩn chẩn đoán rối loạn lo âu lan tỏa",
+]
+
+
+def _model_dir(model_name: str, root: str | Path) -> Path:
+    return Path(root) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+def export_onnx_model(model_name: str, output_dir: str | Path, quantize: bool = True) -> Path:
+    """
+    Export a sentence-transformers model to ONNX, optionally with int8 weights.
+
+    Writes ``model.onnx`` (and ``model_int8.onnx`` when quantizing), the fast
+    tokenizer and a ``config.json`` describing pooling and normalization, so
+    inference only needs ``onnxruntime`` and ``tokenizers``.
+
+    Args:
+        model_name: sentence-transformers model name
+        output_dir: Directory to write the export to
+        quantize: Also write a dynamically int8-quantized model
+
+    Returns:
+        The export directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    tokenizer = transformer.tokenizer
+    pooling = st_model[1]
+    if not getattr(pooling, "pooling_mode_mean_tokens", False):
+        raise ValueError(f"Only mean-pooling models can be exported, got {model_name}")
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, **inputs):
+            return self.model(**inputs)[0]
+
+    sample = tokenizer(["export"], return_tensors="pt")
+    input_names = list(sample.keys())
+    torch.onnx.export(
+        LastHiddenState(transformer.auto_model).eval(),
+        args=(),
+        kwargs=dict(sample),
+        f=str(output_dir / "model.onnx"),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+        opset_version=14,
+        dynamo=False,
+    )
+    tokenizer.save_pretrained(str(output_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(
+            str(output_dir / "model.onnx"),
+            str(output_dir / "model_int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+    }
+    with open(output_dir / "config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"✓ Exported {model_name} to ONNX: {output_dir}")
+    return output_dir
+
+
+class OnnxEmbeddings(Embeddings):
+    """Mean-pooled sentence embeddings computed with ONNX Runtime on CPU."""
+
+    def __init__(self, model_dir: str | Path, quantized: bool = False, batch_size: int = 32, threads: int = 0):
+        """
+        Initialize ONNX embeddings.
+
+        Args:
+            model_dir: Directory written by ``export_onnx_model``
+            quantized: Use the int8 model
+            batch_size: Texts per inference call
+            threads: ONNX Runtime intra-op threads (0 = runtime default)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.model_name = self.config["model_name"]
+        self.normalize = self.config["normalize"]
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            weights = mask[:, :, None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled)
+        return np.vstack(outputs) if outputs else np.zeros((0, self.config["dimension"]), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents."""
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self._embed([text])[0].tolist()
+
+
+def validate_embeddings(
+    candidate: Embeddings,
+    reference: Embeddings,
+    texts: Optional[List[str]] = None,
+    min_cosine: float = 0.98,
+) -> float:
+    """
+    Check that an alternative backend agrees with the reference model.
+
+    Args:
+        candidate: Embeddings under test (e.g. ONNX int8)
+        reference: Reference embeddings (PyTorch)
+        texts: Texts to compare on
+        min_cosine: Minimum acceptable per-text cosine similarity
+
+    Returns:
+        The lowest cosine similarity observed
+
+    Raises:
+        ValueError: If any text falls below ``min_cosine``
+    """
+    texts = texts or VALIDATION_TEXTS
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    cosines = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    worst = float(cosines.min())
+    if worst < min_cosine:
+        raise ValueError(f"ONNX embeddings disagree with PyTorch (min cosine {worst:.4f} < {min_cosine})")
+    return worst
+
+
+def create_onnx_embeddings(
+    model_name: str,
+    root: str | Path,
+    quantized: bool = False,
+    min_cosine: float = 0.98,
+) -> OnnxEmbeddings:
+    """
+    Load ONNX embeddings for a model, exporting and validating it on first use.
+
+    The export is validated once against the PyTorch model; the result is
+    recorded next to the export so later startups skip loading PyTorch.
+
+    Args:
+        model_name: sentence-transformers model name
+        root: Directory holding ONNX exports
+        quantized: Use int8 dynamic quantization
+        min_cosine: Minimum cosine agreement with the PyTorch output
+
+    Returns:
+        OnnxEmbeddings instance
+    """
+    model_dir = _model_dir(model_name, root)
+    variant = "int8" if quantized else "fp32"
+    marker = model_dir / f"validated_{variant}.json"
+
+    if not (model_dir / "config.json").exists() or (quantized and not (model_dir / "model_int8.onnx").exists()):
+        export_onnx_model(model_name, model_dir, quantize=True)
+
+    embeddings = OnnxEmbeddings(model_dir, quantized=quantized)
+    if not marker.exists():
+        from langchain_huggingface import HuggingFaceEmbeddings
+        worst = validate_embeddings(embeddings, HuggingFaceEmbeddings(model_name=model_name), min_cosine=min_cosine)
+        with open(marker, "w", encoding="utf-8") as f:
+            json.dump({"min_cosine": worst}, f)
+        print(f"✓ ONNX {variant} embeddings validated against PyTorch (min cosine {worst:.4f})")
+    return embeddings
@@ -0,0 +1,122 @@
+"""Registry of supported embedding models and per-model collections."""
+import re
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+from langchain_chroma import Chroma
+
+
+class EmbeddingModelMismatchError(ValueError):
+    """Raised when vectors from one embedding model meet a collection built with another."""
+
+
+@dataclass(frozen=True)
+class EmbeddingModelSpec:
+    """Static description of an embedding model."""
+
+    name: str
+    provider: str  # "google" or "sentence-transformers"
+    dimension: int
+    multilingual: bool = False  # handles Vietnamese
+    word_segmentation: bool = False  # expects pyvi-segmented Vietnamese ("trầm_cảm")
+
+
+EMBEDDING_MODELS: Dict[str, EmbeddingModelSpec] = {}
+
+
+def register_embedding_model(spec: EmbeddingModelSpec) -> None:
+    """Add an embedding model to the registry."""
+    EMBEDDING_MODELS[spec.name] = spec
+
+
+register_embedding_model(EmbeddingModelSpec("sentence-transformers/all-MiniLM-L6-v2", "sentence-transformers", 384))
+register_embedding_model(EmbeddingModelSpec("models/gemini-embedding-001", "google", 3072, multilingual=True))
+register_embedding_model(
+    EmbeddingModelSpec(
+        "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", "sentence-transformers", 384, multilingual=True
+    )
+)
+register_embedding_model(
+    EmbeddingModelSpec(
+        "bkai-foundation-models/vietnamese-bi-encoder",
+        "sentence-transformers",
+        768,
+        multilingual=True,
+        word_segmentation=True,
+    )
+)
+
+
+def get_embedding_spec(model_name: str) -> EmbeddingModelSpec:
+    """
+    Look up a registered embedding model.
+
+    Args:
+        model_name: Model name, as in ``Settings.embedding_model``
+
+    Returns:
+        EmbeddingModelSpec for the model
+
+    Raises:
+        ValueError: If the model is not registered
+    """
+    try:
+        return EMBEDDING_MODELS[model_name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding model {model_name!r}; registered: {', '.join(sorted(EMBEDDING_MODELS))}"
+        ) from None
+
+
+def collection_name_for(base_name: str, model_name: str) -> str:
+    """
+    Return the collection holding ``base_name`` embedded with ``model_name``.
+
+    Each model gets its own collection so several can be kept side by side.
+
+    Args:
+        base_name: Logical collection name (``Settings.vector_store_collection``)
+        model_name: Embedding model name
+
+    Returns:
+        Chroma-compatible collection name, e.g.
+        ``psychology_knowledge_base__all-MiniLM-L6-v2``
+    """
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "-", model_name.rsplit("/", 1)[-1]).strip("-.")
+    return f"{base_name}__{slug}"[:512]
+
+
+def collection_metadata_for(spec: EmbeddingModelSpec) -> Dict[str, object]:
+    """Return the metadata recorded on a collection built with ``spec``."""
+    return {"embedding_model": spec.name, "embedding_dimension": spec.dimension}
+
+
+def check_collection_model(vector_store: Chroma, spec: EmbeddingModelSpec) -> None:
+    """
+    Verify that a collection was built with the given embedding model.
+
+    Raises:
+        EmbeddingModelMismatchError: If the collection records another model
+            or dimension
+    """
+    metadata = vector_store._collection.metadata or {}
+    model = metadata.get("embedding_model")
+    dimension = metadata.get("embedding_dimension")
+    if (model is not None and model != spec.name) or (dimension is not None and dimension != spec.dimension):
+        raise EmbeddingModelMismatchError(
+            f"Collection {vector_store._collection.name!r} was built with {model} ({dimension}d), "
+            f"not {spec.name} ({spec.dimension}d)"
+        )
+
+
+def check_vector_dimension(vector: Sequence[float], spec: EmbeddingModelSpec) -> None:
+    """
+    Refuse a query vector whose dimension does not match the collection's model.
+
+    Raises:
+        EmbeddingModelMismatchError: On a dimension mismatch
+    """
+    if len(vector) != spec.dimension:
+        raise EmbeddingModelMismatchError(
+            f"Query vector has {len(vector)} dimensions, collection expects {spec.dimension} ({spec.name})"
+        )
@@ -0,0 +1,65 @@
+"""Client for the shared embedding server."""
+from typing import List, Optional
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeddings computed by a shared embedding server process.
+
+    Lets every Chainlit worker use one hosted model instead of loading its
+    own copy. Accepts ``http://host:port`` or ``unix:///path/to/socket``
+    URLs.
+    """
+
+    def __init__(self, url: str, model_name: Optional[str] = None, timeout: float = 30.0):
+        """
+        Initialize remote embeddings.
+
+        Args:
+            url: Server URL
+            model_name: Expected model; requests fail if the server hosts a
+                different one
+            timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.model_name = model_name
+        if url.startswith("unix://"):
+            transport = httpx.HTTPTransport(uds=url[len("unix://"):])
+            base_url = "http://embedding-server"
+        else:
+            transport = None
+            base_url = url.rstrip("/")
+        self._client = httpx.Client(base_url=base_url, transport=transport, timeout=timeout)
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        if not texts:
+            return []
+        response = self._client.post("/embed", json={"texts": texts, "kind": kind})
+        response.raise_for_status()
+        payload = response.json()
+        if self.model_name and payload.get("model") != self.model_name:
+            raise ValueError(
+                f"Embedding server at {self.url} hosts {payload.get('model')!r}, expected {self.model_name!r}"
+            )
+        return payload["embeddings"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents on the server."""
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query on the server."""
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one request."""
+        return self._embed(texts, "query")
+
+    def health(self) -> dict:
+        """Return the server's health payload."""
+        response = self._client.get("/health")
+        response.raise_for_status()
+        return response.json()
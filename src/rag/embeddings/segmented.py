@@ -0,0 +1,39 @@
+"""Embeddings for models that expect word-segmented Vietnamese input."""
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.rag.embeddings.batching import embed_query_batch
+from src.rag.normalize import segment_words
+
+
+class SegmentedEmbeddings(Embeddings):
+    """
+    Word-segments texts (``trầm cảm`` -> ``trầm_cảm``) before embedding them.
+
+    For encoders trained on segmented text, such as PhoBERT-based models.
+    Stored chunk texts stay unsegmented; only the model input changes.
+    """
+
+    def __init__(self, underlying: Embeddings):
+        """
+        Initialize segmented embeddings.
+
+        Args:
+            underlying: Embeddings of the segmented-text model
+        """
+        self.underlying = underlying
+        # Fail at startup rather than on the first query if pyvi is missing
+        segment_words("")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents."""
+        return self.underlying.embed_documents([segment_words(text) for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        return self.underlying.embed_query(segment_words(text))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one batch."""
+        return embed_query_batch(self.underlying, [segment_words(text) for text in texts])
@@ -0,0 +1,230 @@
+"""
+Shared embedding server: one model instance serving every Chainlit worker.
+
+Run it once per host and point the workers at it with EMBEDDING_SERVER_URL:
+
+    python -m src.rag.embeddings.server --socket /tmp/rag-embeddings.sock
+    python -m src.rag.embeddings.server --host 127.0.0.1 --port 8765
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from src.rag.embeddings.batching import embed_query_batch
+
+# Largest request accepted, in bytes
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+
+
+class EmbeddingBatchWorker:
+    """
+    Single thread that owns the model and encodes requests in batches.
+
+    Requests queue up while a batch is being encoded; the next batch takes
+    everything that arrived within ``window`` seconds, up to ``max_batch``
+    texts, and runs one forward pass per kind (query/document).
+    """
+
+    def __init__(self, embeddings: Embeddings, window: float = 0.005, max_batch: int = 64):
+        """
+        Initialize worker.
+
+        Args:
+            embeddings: Embeddings hosted by the server
+            window: Seconds to wait for more requests after the first one
+            max_batch: Texts per forward pass
+        """
+        self.embeddings = embeddings
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.texts = 0
+        self._queue: "queue.Queue[Tuple[str, List[str], Future]]" = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def submit(self, kind: str, texts: List[str]) -> List[List[float]]:
+        """Queue texts for encoding and block until their vectors are ready."""
+        future: Future = Future()
+        self._queue.put((kind, texts, future))
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][1])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[1])
+
+            for kind in ("query", "document"):
+                requests = [(texts, future) for k, texts, future in batch if k == kind]
+                if requests:
+                    self._encode(kind, requests)
+
+    def _encode(self, kind: str, requests: List[Tuple[List[str], Future]]) -> None:
+        texts = [text for request_texts, _ in requests for text in request_texts]
+        try:
+            if kind == "query":
+                vectors = embed_query_batch(self.embeddings, texts)
+            else:
+                vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(texts)
+        offset = 0
+        for request_texts, future in requests:
+            future.set_result(vectors[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+
+def make_handler(worker: EmbeddingBatchWorker, model_name: str):
+    """Build the HTTP request handler class bound to a batch worker."""
+
+    class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {
+                    "status": "ok",
+                    "model": model_name,
+                    "batches": worker.batches,
+                    "texts": worker.texts,
+                })
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/embed":
+                self._send_json(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_REQUEST_BYTES:
+                self._send_json(413, {"error": "request too large"})
+                return
+            try:
+                request = json.loads(self.rfile.read(length))
+                kind = request.get("kind", "document")
+                texts = request["texts"]
+                if kind not in ("query", "document") or not isinstance(texts, list):
+                    raise ValueError("expected {'texts': [...], 'kind': 'query'|'document'}")
+            except (KeyError, ValueError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                vectors = worker.submit(kind, [str(text) for text in texts])
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"model": model_name, "embeddings": vectors})
+
+        def address_string(self):
+            return str(self.client_address[0]) if self.client_address else "unix"
+
+        def log_message(self, format, *args):
+            pass
+
+    return EmbeddingRequestHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a unix domain socket."""
+
+    daemon_threads = True
+
+
+def serve(
+    embeddings: Embeddings,
+    model_name: str,
+    socket_path: str = "",
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    window: float = 0.005,
+    max_batch: int = 64,
+) -> None:
+    """
+    Serve embeddings over HTTP until interrupted.
+
+    Args:
+        embeddings: Embeddings to host
+        model_name: Model name reported to clients
+        socket_path: Unix socket to listen on; TCP ``host:port`` is used if empty
+        host: TCP host
+        port: TCP port
+        window: Batching window in seconds
+        max_batch: Texts per forward pass
+    """
+    handler = make_handler(EmbeddingBatchWorker(embeddings, window, max_batch), model_name)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        address = f"unix://{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{port}"
+
+    print(f"✓ Embedding server for {model_name} listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    from config.settings import get_settings
+    from src.rag.embeddings.vectorstore import initialize_embeddings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Shared embedding server")
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--socket", default="", help="unix socket path (overrides --host/--port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    embeddings = initialize_embeddings(
+        args.model,
+        cache_path=settings.embedding_cache_path or None,
+        backend=settings.embedding_backend,
+        onnx_dir=settings.onnx_model_dir,
+    )
+    serve(embeddings, args.model, args.socket, args.host, args.port, args.window_ms / 1000, args.max_batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,77 @@
 """Vector store and embedding initialization."""
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
 from pathlib import Path
 from typing import Optional
 
+from src.rag.embeddings.cache import with_embedding_cache
+from src.rag.embeddings.onnx_backend import EMBEDDING_BACKENDS, create_onnx_embeddings
+from src.rag.embeddings.registry import (
+    check_collection_model,
+    collection_metadata_for,
+    collection_name_for,
+    get_embedding_spec,
+)
+from src.rag.embeddings.remote import RemoteEmbeddings
+from src.rag.embeddings.segmented import SegmentedEmbeddings
 
-def initialize_embeddings(model: str = "models/gemini-embedding-001") -> GoogleGenerativeAIEmbeddings:
+
+def initialize_embeddings(
+    model: str = "models/gemini-embedding-001",
+    cache_path: Optional[str | Path] = None,
+    backend: str = "torch",
+    onnx_dir: str | Path = ".data/models/onnx",
+    server_url: Optional[str] = None,
+) -> Embeddings:
     """
-    Initialize Google Generative AI embeddings.
+    Initialize embeddings for a Google or sentence-transformers model.
     
     Args:
-        model: Embedding model name
+        model: Registered embedding model name (see
+            ``src.rag.embeddings.registry``)
+        cache_path: SQLite file for the persistent embedding cache, or None
+            to compute every text
+        backend: ``torch``, ``onnx`` or ``onnx-int8`` (sentence-transformers
+            models only)
+        onnx_dir: Directory holding ONNX exports
+        server_url: Shared embedding server to use instead of loading the
+            model in this process (the server applies its own cache)
         
     Returns:
-        GoogleGenerativeAIEmbeddings instance
+        Embeddings instance, wrapped in CachedEmbeddings when a cache path
+        is given (and in SegmentedEmbeddings for models trained on
+        word-segmented Vietnamese)
     """
-    embeddings = GoogleGenerativeAIEmbeddings(model=model)
-    print(f"✓ Embeddings initialized: {model}")
-    return embeddings
+    if server_url:
+        print(f"✓ Embeddings served by {server_url}: {model}")
+        return RemoteEmbeddings(server_url, model_name=model)
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
+    spec = get_embedding_spec(model)
+    if spec.provider == "google":
+        embeddings = GoogleGenerativeAIEmbeddings(model=model)
+        cache_key = model
+    elif backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=model)
+        cache_key = model
+    else:
+        embeddings = create_onnx_embeddings(model, onnx_dir, quantized=backend == "onnx-int8")
+        cache_key = f"{model}@{backend}"
+    if spec.word_segmentation:
+        embeddings = SegmentedEmbeddings(embeddings)
+    print(f"✓ Embeddings initialized: {model} ({backend})")
+    return with_embedding_cache(embeddings, cache_key, cache_path)
 
 
 def initialize_vector_store(
-    embeddings: GoogleGenerativeAIEmbeddings,
+    embeddings: Embeddings,
     collection_name: str = "documents",
-    persist_directory: Optional[str] = None
+    persist_directory: Optional[str] = None,
+    embedding_model: Optional[str] = None,
 ) -> Chroma:
     """
     Initialize Chroma vector store.
@@ -32,17 +80,34 @@ def initialize_vector_store(
         embeddings: Embeddings instance
         collection_name: Name of the collection
         persist_directory: Directory for persistence
+        embedding_model: Registered model producing ``embeddings``. When
+            given, the model gets its own collection (suffixed with the
+            model name) whose metadata records the model and dimension, so
+            several models can be kept side by side
         
     Returns:
         Chroma vector store instance
+
+    Raises:
+        EmbeddingModelMismatchError: If the collection was built with a
+            different model
     """
     if persist_directory:
         persist_directory = str(Path(persist_directory).resolve())
+
+    collection_metadata = None
+    if embedding_model:
+        spec = get_embedding_spec(embedding_model)
+        collection_name = collection_name_for(collection_name, spec.name)
+        collection_metadata = collection_metadata_for(spec)
     
     vector_store = Chroma(
         collection_name=collection_name,
         embedding_function=embeddings,
         persist_directory=persist_directory,
+        collection_metadata=collection_metadata,
     )
+    if embedding_model:
+        check_collection_model(vector_store, spec)
     print(f"✓ Vector store initialized: {collection_name}")
     return vector_store
@@ -0,0 +1 @@
+"""Retrieval evaluation and benchmarks."""
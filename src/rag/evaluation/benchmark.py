@@ -0,0 +1,248 @@
+"""Recall@k / latency benchmark for embedding models and text normalization.
+
+Usage:
+    python -m src.rag.evaluation.benchmark \
+        --models sentence-transformers/all-MiniLM-L6-v2 sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 \
+        --k 1 2 5
+"""
+import argparse
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.rag.loaders.chunking import ChunkingConfig
+from src.rag.loaders.directory_loader import discover_documents, iter_chunks
+from src.rag.normalize import normalize_text
+
+DEFAULT_QUERIES = Path(__file__).resolve().parents[3] / "data" / "eval" / "retrieval_vi.jsonl"
+
+
+@dataclass
+class BenchmarkResult:
+    """Scores of one (model, normalization) combination."""
+
+    model: str
+    normalize: bool
+    recall: Dict[int, float]
+    mrr: float
+    query_ms_p50: float
+    query_ms_p95: float
+    index_seconds: float
+    chunks: int
+
+
+def load_queries(path: str | Path) -> List[dict]:
+    """
+    Load evaluation queries from JSON lines.
+
+    Each line holds ``query`` and ``relevant``, the criteria a chunk must meet
+    to count as an answer (see ``is_relevant``):
+
+    - ``section`` and ``heading``: outline section titles and subsection
+      headings (English and Vietnamese spellings) of the passage answering
+      the query, e.g. the "Diagnostic Criteria" of "Insomnia Disorder"
+    - ``all_of``: phrase groups; a chunk must contain one phrase of every
+      group, e.g. the duration and frequency of the insomnia criteria
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fold(text: str) -> str:
+    return normalize_text(text).casefold().strip().rstrip(":")
+
+
+def is_relevant(doc: Document, relevant: dict) -> bool:
+    """
+    Return True if a chunk answers a query.
+
+    A chunk is relevant if it lies under one of the ``heading``s of one of
+    the ``section``s (metadata compared exactly, after normalization and
+    case folding), or if it contains a phrase of every ``all_of`` group.
+    Broad matches such as the chapter or a disorder name alone do not count:
+    nearly every chunk of a chapter would pass them.
+    """
+    sections = {_fold(title) for title in relevant.get("section", [])}
+    headings = {_fold(heading) for heading in relevant.get("heading", [])}
+    if sections and _fold(str(doc.metadata.get("section", ""))) in sections:
+        if not headings or _fold(str(doc.metadata.get("heading", ""))) in headings:
+            return True
+
+    groups = relevant.get("all_of", [])
+    text = _fold(doc.page_content)
+    return bool(groups) and all(any(_fold(phrase) in text for phrase in group) for group in groups)
+
+
+def evaluate(
+    embeddings,
+    model: str,
+    chunks: Sequence[Document],
+    queries: Sequence[dict],
+    ks: Sequence[int],
+    normalize: bool,
+) -> BenchmarkResult:
+    """
+    Embed the chunks, run every query with exact search and score the rankings.
+
+    Args:
+        embeddings: Embeddings of the model under test
+        model: Model name (for the report)
+        chunks: Chunks to search, already normalized if ``normalize``
+        queries: Evaluation queries (see ``load_queries``)
+        ks: Cut-offs for recall@k
+        normalize: Whether queries are normalized like the chunks
+
+    Returns:
+        BenchmarkResult
+    """
+    started = time.perf_counter()
+    matrix = np.asarray(embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
+    index_seconds = time.perf_counter() - started
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks, latencies = [], []
+    depth = max(ks)
+    for item in queries:
+        query = normalize_text(item["query"]) if normalize else item["query"]
+        started = time.perf_counter()
+        vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        scores = matrix @ vector
+        top = np.argpartition(-scores, min(depth, len(scores)) - 1)[:depth]
+        top = top[np.argsort(-scores[top])]
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        ranks = [rank for rank, row in enumerate(top, start=1) if is_relevant(chunks[row], item["relevant"])]
+        for k in ks:
+            hits[k] += bool(ranks and ranks[0] <= k)
+        reciprocal_ranks.append(1.0 / ranks[0] if ranks else 0.0)
+
+    latencies.sort()
+    return BenchmarkResult(
+        model=model,
+        normalize=normalize,
+        recall={k: hits[k] / len(queries) for k in ks},
+        mrr=statistics.fmean(reciprocal_ranks),
+        query_ms_p50=latencies[len(latencies) // 2],
+        query_ms_p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        index_seconds=index_seconds,
+        chunks=len(chunks),
+    )
+
+
+def run_benchmark(
+    models: Sequence[str],
+    documents: Sequence[Path],
+    queries: Sequence[dict],
+    ks: Sequence[int] = (1, 2, 5),
+    chunking: Optional[ChunkingConfig] = None,
+    backend: str = "torch",
+    onnx_dir: str | Path = ".data/models/onnx",
+) -> List[BenchmarkResult]:
+    """
+    Benchmark every model with and without text normalization.
+
+    Embeddings are computed without the persistent cache so index times are
+    real.
+
+    Args:
+        models: Registered embedding model names
+        documents: Documents to chunk and search
+        queries: Evaluation queries
+        ks: Cut-offs for recall@k
+        chunking: Chunking settings (its ``normalize`` flag is varied)
+        backend: Embedding backend for sentence-transformers models
+        onnx_dir: Directory holding ONNX exports
+
+    Returns:
+        One BenchmarkResult per (model, normalization) combination
+    """
+    from src.rag.embeddings.vectorstore import initialize_embeddings
+
+    chunking = chunking or ChunkingConfig()
+    corpora = {}
+    for normalize in (False, True):
+        config = ChunkingConfig(**{**asdict(chunking), "normalize": normalize})
+        corpora[normalize] = [chunk for path in documents for chunk in iter_chunks(path, config)]
+        print(f"✓ {len(corpora[normalize])} chunks (normalize={normalize})")
+        unanswerable = [
+            item["query"] for item in queries
+            if not any(is_relevant(chunk, item["relevant"]) for chunk in corpora[normalize])
+        ]
+        if unanswerable:
+            # These count as misses for every model: fix their criteria for this corpus
+            print(f"⚠ Warning: no chunk meets the relevance criteria of {len(unanswerable)} queries: {unanswerable}")
+
+    results = []
+    for model in models:
+        embeddings = initialize_embeddings(model, backend=backend, onnx_dir=onnx_dir)
+        for normalize, chunks in corpora.items():
+            result = evaluate(embeddings, model, chunks, queries, ks, normalize)
+            results.append(result)
+            print(format_results([result], ks, header=False))
+    return results
+
+
+def format_results(results: Sequence[BenchmarkResult], ks: Sequence[int], header: bool = True) -> str:
+    """Render results as a Markdown table."""
+    lines = []
+    if header:
+        columns = ["model", "normalize", *[f"recall@{k}" for k in ks], "MRR", "query p50 ms", "query p95 ms", "index s"]
+        lines.append("| " + " | ".join(columns) + " |")
+        lines.append("|" + "---|" * len(columns))
+    for result in results:
+        cells = [
+            result.model,
+            "yes" if result.normalize else "no",
+            *[f"{result.recall[k]:.2f}" for k in ks],
+            f"{result.mrr:.3f}",
+            f"{result.query_ms_p50:.1f}",
+            f"{result.query_ms_p95:.1f}",
+            f"{result.index_seconds:.1f}",
+        ]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    from config.settings import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Retrieval recall@k / latency benchmark")
+    parser.add_argument("--models", nargs="+", default=[settings.embedding_model])
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES))
+    parser.add_argument("--documents", default=str(settings.documents_dir))
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 2, 5])
+    parser.add_argument("--output", default="", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    documents = Path(args.documents)
+    paths = discover_documents(documents) if documents.is_dir() else [documents]
+    if not paths:
+        raise SystemExit(f"No documents found in {documents}")
+
+    results = run_benchmark(
+        args.models,
+        paths,
+        load_queries(args.queries),
+        ks=args.k,
+        chunking=ChunkingConfig.from_settings(settings),
+        backend=settings.embedding_backend,
+        onnx_dir=settings.onnx_model_dir,
+    )
+    print()
+    print(format_results(results, args.k))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Incremental indexing of documents into the vector store."""
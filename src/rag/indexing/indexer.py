@@ -0,0 +1,229 @@
+"""Incremental synchronisation of source documents with a vector store."""
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_chroma import Chroma
+
+from src.rag.indexing.manifest import FileRecord, IndexManifest, chunk_ids_for, file_sha256
+from src.rag.indexing.writer import BatchedVectorWriter
+from src.rag.loaders.chunking import ChunkingConfig
+from src.rag.loaders.directory_loader import ChunkBatch, iter_chunk_batches
+
+DELETE_BATCH_SIZE = 5000
+
+
+@dataclass
+class IndexStats:
+    """Summary of one indexing run."""
+
+    files_scanned: int = 0
+    files_changed: int = 0
+    files_removed: int = 0
+    files_failed: int = 0
+    chunks_added: int = 0
+    chunks_deleted: int = 0
+    chunks_unchanged: int = 0
+    chunks_per_second: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """True if the run modified the vector store."""
+        return bool(self.chunks_added or self.chunks_deleted)
+
+
+def _delete_ids(vector_store: Chroma, ids: List[str]) -> None:
+    """Delete vectors in batches small enough for Chroma."""
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        vector_store.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+
+
+@dataclass
+class _FileProgress:
+    """Chunks seen so far for a file that is being re-indexed."""
+
+    known: set
+    ids: List[str] = field(default_factory=list)
+    seen: Dict[str, int] = field(default_factory=dict)
+
+
+def sync_documents(
+    vector_store: Chroma,
+    paths: Iterable[str | Path],
+    manifest: IndexManifest,
+    load_chunk_batches: Callable[[List[Path]], Iterable[ChunkBatch]],
+    batch_size: Optional[int] = None,
+) -> IndexStats:
+    """
+    Bring the vector store in line with the given source files.
+
+    Files whose size/mtime or content hash match the manifest are skipped
+    without being parsed. The remaining files are handed to
+    ``load_chunk_batches`` in one call (so it can parse them in parallel) and
+    their chunks are consumed as a stream: chunks whose content hash is new
+    go to a ``BatchedVectorWriter`` that embeds and upserts them in batches,
+    so memory stays flat regardless of document size. Vectors for chunks (or
+    whole files) that disappeared are deleted.
+
+    A file whose batches stop without a ``done`` marker failed to load: the
+    new chunks already written for it are deleted again and its previous
+    manifest record is kept, so it is retried on the next run.
+
+    Args:
+        vector_store: Chroma vector store to update
+        paths: Source files that should be indexed
+        manifest: Manifest of what is currently indexed; its ``pipeline``
+            signature must be set to the current loading/splitting settings
+        load_chunk_batches: Callable streaming (path, chunks, done) batches
+            for a list of files, in any order
+        batch_size: Chunks per embedding/upsert batch; defaults to the
+            Chroma client's maximum batch size
+
+    Returns:
+        IndexStats describing the work done
+    """
+    start = time.perf_counter()
+    stats = IndexStats()
+    previous = IndexManifest.load(manifest.path)
+    same_pipeline = previous.pipeline == manifest.pipeline
+
+    # Without a manifest we cannot tell which stored vectors are ours, so
+    # reconcile against everything currently in the collection.
+    if previous.exists:
+        orphan_ids = set()
+    else:
+        orphan_ids = set(vector_store.get(include=[])["ids"])
+
+    # Find changed files without parsing anything
+    manifest.files = {}
+    changed: Dict[str, Tuple[Path, str, os.stat_result]] = {}
+    for path in map(Path, paths):
+        key = path.as_posix()
+        stats.files_scanned += 1
+        stat = path.stat()
+        record = previous.files.get(key)
+
+        if record and same_pipeline:
+            if record.size == stat.st_size and record.mtime_ns == stat.st_mtime_ns:
+                manifest.files[key] = record
+                stats.chunks_unchanged += len(record.chunk_ids)
+                continue
+            sha256 = file_sha256(path)
+            if record.sha256 == sha256:
+                manifest.files[key] = FileRecord(sha256, stat.st_size, stat.st_mtime_ns, record.chunk_ids)
+                stats.chunks_unchanged += len(record.chunk_ids)
+                continue
+        else:
+            sha256 = file_sha256(path)
+        changed[key] = (path, sha256, stat)
+        if record:
+            # Keep the old record until the file is re-indexed, so an
+            # interrupted run still knows which vectors belong to it
+            manifest.files[key] = record
+
+    # Stream chunks of changed files, embedding new ones in bounded batches
+    if changed:
+        print(f"Indexing {len(changed)} changed file(s)...")
+    progress: Dict[str, _FileProgress] = {}
+    writer = BatchedVectorWriter(vector_store, batch_size=batch_size or None)
+
+    for path, chunks, done in load_chunk_batches([path for path, _, _ in changed.values()]):
+        key = path.as_posix()
+        record = previous.files.get(key)
+        state = progress.setdefault(key, _FileProgress(set(record.chunk_ids) if record else set()))
+
+        ids = chunk_ids_for(chunks, state.seen)
+        state.ids.extend(ids)
+        new = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in state.known]
+        if new:
+            writer.add([chunk_id for chunk_id, _ in new], [chunk for _, chunk in new])
+        stats.chunks_added += len(new)
+        stats.chunks_unchanged += len(ids) - len(new)
+        if not done:
+            continue
+
+        # The whole file has been seen: persist its new chunks, then drop stale ones
+        writer.flush()
+        stale = sorted(state.known.difference(state.ids))
+        if stale:
+            _delete_ids(vector_store, stale)
+            stats.chunks_deleted += len(stale)
+        orphan_ids.difference_update(state.ids)
+
+        _, sha256, stat = changed[key]
+        manifest.files[key] = FileRecord(sha256, stat.st_size, stat.st_mtime_ns, state.ids)
+        manifest.save()
+        stats.files_changed += 1
+        del progress[key]
+        print(f"✓ {path.name}: {len(state.ids)} chunks, {len(stale)} stale removed")
+    writer.close()
+    stats.chunks_per_second = writer.chunks_per_second
+
+    # Files that failed to load part-way: undo their partial writes
+    for key, state in progress.items():
+        partial = sorted(set(state.ids).difference(state.known))
+        if partial:
+            _delete_ids(vector_store, partial)
+            stats.chunks_added -= len(partial)
+        stats.chunks_unchanged -= len(state.ids) - len(partial)
+    stats.files_failed = len(changed) - stats.files_changed
+    if stats.files_failed:
+        print(f"⚠ Warning: {stats.files_failed} file(s) could not be indexed and will be retried next run")
+
+    # Files that are no longer present
+    for key, record in previous.files.items():
+        if key not in manifest.files:
+            _delete_ids(vector_store, record.chunk_ids)
+            stats.files_removed += 1
+            stats.chunks_deleted += len(record.chunk_ids)
+            print(f"✓ Removed {len(record.chunk_ids)} chunks of deleted file {key}")
+
+    orphan_ids.difference_update(manifest.all_chunk_ids())
+    if orphan_ids:
+        _delete_ids(vector_store, sorted(orphan_ids))
+        stats.chunks_deleted += len(orphan_ids)
+        print(f"✓ Removed {len(orphan_ids)} chunks not tracked by the manifest")
+
+    manifest.save()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def index_documents(
+    vector_store: Chroma,
+    paths: Iterable[str | Path],
+    manifest_path: str | Path,
+    chunking: Optional[ChunkingConfig] = None,
+    max_workers: Optional[int] = None,
+    high_water_mark: int = 256,
+    batch_size: Optional[int] = None,
+) -> IndexStats:
+    """
+    Incrementally index documents, streaming chunks from a pool of parsers.
+
+    Args:
+        vector_store: Chroma vector store to update
+        paths: Source files that should be indexed
+        manifest_path: Location of the collection's manifest
+        chunking: Chunking settings (defaults to the structured chunker)
+        max_workers: Parser processes (defaults to the CPU count)
+        high_water_mark: Maximum number of chunks buffered between parsing
+            and embedding
+        batch_size: Chunks per embedding/upsert batch; defaults to
+            ``high_water_mark`` so the writer does not hold more chunks than
+            the parse queue (and is capped at the Chroma client's maximum)
+
+    Returns:
+        IndexStats describing the work done
+    """
+    chunking = chunking or ChunkingConfig()
+    batch_size = batch_size or high_water_mark
+    manifest = IndexManifest(manifest_path, pipeline=chunking.signature())
+
+    def load_chunk_batches(changed_paths: List[Path]):
+        return iter_chunk_batches(changed_paths, chunking, max_workers, high_water_mark)
+
+    return sync_documents(vector_store, paths, manifest, load_chunk_batches, batch_size)
@@ -0,0 +1,143 @@
+"""Content-hash manifest tracking what has been indexed into a collection."""
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class FileRecord:
+    """Indexed state of one source file."""
+
+    sha256: str
+    size: int
+    mtime_ns: int
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+class IndexManifest:
+    """
+    Per-file and per-chunk content hashes for one vector store collection.
+
+    The manifest lives next to the Chroma directory and lets indexing skip
+    files whose content has not changed, embed only new chunks and delete the
+    vectors of chunks that disappeared.
+    """
+
+    def __init__(self, path: str | Path, pipeline: str = "", files: Optional[Dict[str, FileRecord]] = None):
+        """
+        Initialize manifest.
+
+        Args:
+            path: Location of the manifest JSON file
+            pipeline: Signature of the loading/splitting settings used to
+                produce the chunks
+            files: Indexed files keyed by path
+        """
+        self.path = Path(path)
+        self.pipeline = pipeline
+        self.files: Dict[str, FileRecord] = files or {}
+        self.exists = self.path.exists()
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IndexManifest":
+        """
+        Load a manifest from disk, returning an empty one if missing or unreadable.
+
+        Args:
+            path: Location of the manifest JSON file
+
+        Returns:
+            IndexManifest instance
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Warning: could not read index manifest {path}: {e}")
+            return cls(path)
+
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+
+        files = {key: FileRecord(**record) for key, record in data.get("files", {}).items()}
+        manifest = cls(path, pipeline=data.get("pipeline", ""), files=files)
+        manifest.exists = True
+        return manifest
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "pipeline": self.pipeline,
+            "files": {key: asdict(record) for key, record in sorted(self.files.items())},
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self.exists = True
+
+    def all_chunk_ids(self) -> set[str]:
+        """Return the ids of every chunk recorded in the manifest."""
+        return {chunk_id for record in self.files.values() for chunk_id in record.chunk_ids}
+
+
+def manifest_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """
+    Return the manifest location for a collection, next to its Chroma directory.
+
+    Args:
+        persist_directory: Chroma persist directory
+        collection_name: Name of the collection
+
+    Returns:
+        Path of the manifest file
+    """
+    return Path(persist_directory).parent / f"{collection_name}.manifest.json"
+
+
+def file_sha256(path: str | Path, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids_for(docs: Iterable[Document], seen: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Derive deterministic chunk ids from chunk content and metadata.
+
+    Identical chunks get the same id across runs, so unchanged chunks are
+    recognised without re-embedding them. Exact duplicates within one batch
+    are disambiguated by their occurrence index.
+
+    Args:
+        docs: Chunks to identify
+        seen: Occurrence counts carried across batches of the same file
+
+    Returns:
+        One id per chunk, in order
+    """
+    ids = []
+    seen = {} if seen is None else seen
+    for doc in docs:
+        metadata = json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(f"{doc.page_content}\x00{metadata}".encode("utf-8")).hexdigest()
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(digest if occurrence == 0 else f"{digest}-{occurrence}")
+    return ids
@@ -0,0 +1,388 @@
+"""Chunking strategies: character-based splitting and a structure-aware DSM-5 chunker."""
+import re
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.rag.loaders.outline import slugify
+from src.rag.normalize import normalize_text
+from src.rag.tokens import TokenCounter
+
+CHUNKING_METHODS = ("structured", "recursive")
+
+# Criterion letters ("A."), numbered symptoms ("1."), sub-items ("a.") and bullets
+_LIST_ITEM = re.compile(r"^\s*(?:(?P<letter>[A-H])\.|(?P<number>\d{1,2})\.|(?P<sub>[a-h])\.|[•●▪◦–-])\s+")
+
+# Headings that open the standard parts of a DSM-5 disorder section, in
+# English and as printed in the Vietnamese translation (compared after
+# normalize_text and casefold, so tone-mark placement does not matter)
+_HEADINGS_EN = {
+    "diagnostic criteria", "specifiers", "subtypes", "recording procedures", "coding and recording procedures",
+    "diagnostic features", "associated features", "associated features supporting diagnosis", "prevalence",
+    "development and course", "risk and prognostic factors", "culture-related diagnostic issues",
+    "sex- and gender-related diagnostic issues", "suicide risk", "association with suicidal thoughts or behavior",
+    "functional consequences", "differential diagnosis", "comorbidity", "diagnostic markers",
+}
+_HEADINGS_VI = {
+    "tiêu chuẩn chẩn đoán", "biệt định", "các biệt định", "phân nhóm", "các phân nhóm", "quy trình ghi mã",
+    "quy trình ghi mã và ghi nhận", "đặc điểm chẩn đoán", "các đặc điểm chẩn đoán", "đặc điểm liên quan",
+    "các đặc điểm liên quan", "các đặc điểm liên quan hỗ trợ chẩn đoán", "tỷ lệ hiện mắc", "tỉ lệ hiện mắc",
+    "tỷ lệ lưu hành", "phát triển và diễn tiến", "sự phát triển và diễn tiến", "yếu tố nguy cơ và tiên lượng",
+    "các yếu tố nguy cơ và tiên lượng", "các vấn đề chẩn đoán liên quan đến văn hoá",
+    "các vấn đề chẩn đoán liên quan đến giới tính", "nguy cơ tự sát", "liên quan với ý nghĩ hoặc hành vi tự sát",
+    "hậu quả chức năng", "hậu quả về chức năng", "chẩn đoán phân biệt", "bệnh đồng mắc", "đồng mắc",
+    "chỉ dấu chẩn đoán", "các chỉ dấu chẩn đoán",
+}
+_KNOWN_HEADINGS = {normalize_text(heading).casefold() for heading in _HEADINGS_EN | _HEADINGS_VI}
+_MINOR_WORDS = {"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with", "due"}
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+
+# Pages grouped per pass for documents without an outline
+_PAGES_PER_GROUP = 8
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """Chunking settings, passed to ingestion worker processes."""
+
+    method: str = "structured"
+    chunk_size: int = 1000  # recursive: characters
+    chunk_overlap: int = 200  # recursive: characters
+    max_tokens: int = 256  # structured
+    min_tokens: int = 32  # structured
+    tokenizer: str = "o200k_base"  # structured, see TokenCounter
+    normalize: bool = True  # NFC + consistent Vietnamese tone marks, see src.rag.normalize
+
+    @classmethod
+    def from_settings(cls, settings) -> "ChunkingConfig":
+        """Build the config from application ``Settings``."""
+        return cls(
+            method=settings.chunking_method,
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            max_tokens=settings.chunk_max_tokens,
+            min_tokens=settings.chunk_min_tokens,
+            tokenizer=settings.chunk_tokenizer,
+            normalize=settings.text_normalization,
+        )
+
+    def signature(self) -> str:
+        """Return the manifest signature; changing it re-indexes every file."""
+        suffix = "+nfc-vi" if self.normalize else ""
+        if self.method == "recursive":
+            return f"recursive+sections:{self.chunk_size}:{self.chunk_overlap}{suffix}"
+        return f"structured+vi-headings:{self.max_tokens}:{self.min_tokens}:{self.tokenizer}{suffix}"
+
+
+@dataclass
+class _Block:
+    """A heading, list item or run of text lines, located on its first page."""
+
+    kind: str  # "heading", "item" or "text"
+    level: int  # list depth for items (1 = criterion letter)
+    text: str
+    metadata: dict  # metadata of the page the block starts on
+    start: int  # offset of the block in that page's text
+    tokens: int = 0
+
+
+def _item_level(match: re.Match) -> int:
+    if match.group("letter"):
+        return 1
+    if match.group("sub"):
+        return 3
+    return 2
+
+
+def _is_known_heading(line: str) -> bool:
+    """Return True for the heading of a standard DSM-5 subsection ("Diagnostic Criteria", "Tỷ lệ hiện mắc", ...)."""
+    return normalize_text(line).casefold().rstrip(":").rstrip() in _KNOWN_HEADINGS
+
+
+def _looks_like_heading(line: str) -> bool:
+    """Short Title Case / upper-case lines without closing punctuation, or a known DSM-5 heading."""
+    if len(line) > 80 or _LIST_ITEM.match(line):
+        return False
+    if _is_known_heading(line):
+        return True
+    if line[-1] in ".,;:" or not line[0].isupper() or any(ch.isdigit() for ch in line):
+        return False
+    words = [word for word in line.split() if word[0].isalpha()]
+    if not words or len(words) > 10:
+        return False
+    return line.isupper() or all(word[0].isupper() or word.lower() in _MINOR_WORDS for word in words)
+
+
+@dataclass
+class _PackState:
+    """Heading context carried from one group of pages to the next."""
+
+    section_id: Optional[str] = None
+    heading: str = ""
+    parent_id: str = ""
+    parents: Dict[str, int] = field(default_factory=dict)
+
+
+class StructuredChunker:
+    """
+    Splits DSM-5 pages along their heading and list structure.
+
+    Pages are parsed into headings, list items and text blocks. A criterion
+    ("A.") and the numbered symptoms under it form one unit that is only
+    split, at item boundaries, when it alone exceeds ``max_tokens``. Units
+    are packed into chunks of at most ``max_tokens`` tokens, and every
+    heading starts a new chunk. Chunks do not overlap.
+
+    Each chunk records a ``parent_id`` naming the heading-level subsection
+    it came from (e.g. ``depressive-disorders/major-depressive-disorder#diagnostic-criteria``),
+    so retrieval can expand a hit to its whole subsection.
+    """
+
+    def __init__(self, max_tokens: int = 256, min_tokens: int = 32, tokenizer: str = "o200k_base"):
+        """
+        Initialize chunker.
+
+        Args:
+            max_tokens: Maximum tokens per chunk
+            min_tokens: Chunks smaller than this are merged into the
+                previous chunk of the same subsection when they fit
+            tokenizer: Tokenizer used to count tokens (see ``TokenCounter``)
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.tokens = TokenCounter(tokenizer)
+
+    def split_pages(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """
+        Chunk a document's pages, one outline section at a time.
+
+        Only one section's blocks are held in memory (or a few pages, for
+        documents without an outline), so criteria lists that continue on
+        the next page stay together without loading the whole document.
+
+        Args:
+            pages: Page Documents in order (e.g. from ``lazy_load_pdf_documents``)
+
+        Yields:
+            Chunk Documents
+        """
+        state = _PackState()
+
+        def group(page: Document):
+            return page.metadata.get("section_id") or page.metadata.get("page", 0) // _PAGES_PER_GROUP
+
+        for _, group_pages in groupby(pages, key=group):
+            yield from self._pack(self._parse(group_pages), state)
+
+    def _parse(self, pages: Iterable[Document]) -> List[_Block]:
+        """Turn the lines of consecutive pages into blocks."""
+        blocks: List[_Block] = []
+        current: Optional[_Block] = None
+        seen_headings = set()
+
+        def flush() -> None:
+            nonlocal current
+            if current is not None:
+                current.tokens = self.tokens.count(current.text)
+                blocks.append(current)
+                current = None
+
+        for page in pages:
+            boundary = True  # the previous line ended a sentence, heading or page
+            page_top = True  # nothing but running headers and page numbers seen on this page yet
+            offset = 0
+            for raw in page.page_content.splitlines(keepends=True):
+                start, offset = offset, offset + len(raw)
+                line = raw.strip()
+                if not line:
+                    if current is not None and current.kind == "text":
+                        flush()
+                    boundary = True
+                    continue
+                if line.isdigit():
+                    # Page number
+                    continue
+
+                item = _LIST_ITEM.match(line)
+                if item:
+                    flush()
+                    current = _Block("item", _item_level(item), line, page.metadata, start)
+                elif boundary and _looks_like_heading(line):
+                    if page_top and line.casefold() in seen_headings and not _is_known_heading(line):
+                        # Running page header repeating a heading (subsection headings such as
+                        # "Tiêu chuẩn chẩn đoán" legitimately repeat once per disorder)
+                        continue
+                    flush()
+                    seen_headings.add(line.casefold())
+                    current = _Block("heading", 0, line, page.metadata, start)
+                    flush()
+                elif current is not None:
+                    current.text += "\n" + line
+                else:
+                    current = _Block("text", 0, line, page.metadata, start)
+                boundary = current is None or line[-1] in ".:;?!)"
+                page_top = False
+        flush()
+        return blocks
+
+    @staticmethod
+    def _units(blocks: List[_Block]) -> Iterator[List[_Block]]:
+        """Group blocks into units that should not be split: a heading, a list, or a paragraph."""
+        unit: List[_Block] = []
+        for block in blocks:
+            in_list = bool(unit) and unit[0].kind == "item"
+            if in_list and block.kind == "item" and block.level > 1:
+                # Symptoms under a criterion, or the next item of a numbered list
+                unit.append(block)
+            elif in_list and block.kind == "text" and unit[0].level == 1:
+                # Notes and continuation text belong to the criterion above them
+                unit.append(block)
+            else:
+                if unit:
+                    yield unit
+                unit = [block]
+                if block.kind == "heading":
+                    yield unit
+                    unit = []
+        if unit:
+            yield unit
+
+    def _split_block(self, block: _Block) -> Iterator[_Block]:
+        """Split a block larger than ``max_tokens`` at sentence ends, or hard at the limit."""
+        piece: Optional[_Block] = None
+        position = 0
+        for sentence in _SENTENCE_BREAK.split(block.text):
+            offset = block.text.find(sentence, position)
+            position = offset + len(sentence)
+            while sentence:
+                head = sentence
+                if self.tokens.count(sentence) > self.max_tokens:
+                    head = self.tokens.head(sentence, self.max_tokens) or sentence[:1]
+                tokens = self.tokens.count(head)
+                if piece is not None and piece.tokens + tokens + 1 > self.max_tokens:
+                    yield piece
+                    piece = None
+                if piece is None:
+                    piece = _Block(block.kind, block.level, head, block.metadata, block.start + offset, tokens)
+                else:
+                    piece.text += " " + head
+                    piece.tokens += tokens + 1
+                sentence = sentence[len(head):]
+                offset += len(head)
+        if piece is not None:
+            yield piece
+
+    def _pack(self, blocks: List[_Block], state: _PackState) -> Iterator[Document]:
+        """Pack units into chunks, tracking the heading each chunk falls under."""
+        chunk: List[_Block] = []
+        pending: Optional[Document] = None
+        pending_tokens = 0
+
+        def size(blocks: List[_Block]) -> int:
+            return sum(block.tokens + 1 for block in blocks)
+
+        def new_parent(block: _Block, name: str) -> str:
+            base = block.metadata.get("section_id") or slugify(Path(str(block.metadata.get("source", ""))).stem)
+            parent = f"{base}#{slugify(name)}"
+            state.parents[parent] = state.parents.get(parent, 0) + 1
+            count = state.parents[parent]
+            return parent if count == 1 else f"{parent}-{count}"
+
+        def emit() -> Iterator[Document]:
+            nonlocal chunk, pending, pending_tokens
+            if not chunk or all(block.kind == "heading" for block in chunk):
+                return
+            first, tokens = chunk[0], size(chunk)
+            text = "\n".join(block.text for block in chunk)
+            chunk = []
+            if pending is not None:
+                small = tokens < self.min_tokens or pending_tokens < self.min_tokens
+                if small and pending.metadata["parent_id"] == state.parent_id and pending_tokens + tokens <= self.max_tokens:
+                    pending.page_content += "\n" + text
+                    pending_tokens += tokens
+                    return
+                yield pending
+            pending = Document(
+                page_content=text,
+                metadata={
+                    **first.metadata,
+                    "start_index": first.start,
+                    "parent_id": state.parent_id,
+                    "heading": state.heading,
+                },
+            )
+            pending_tokens = tokens
+
+        if blocks and blocks[0].metadata.get("section_id") != state.section_id:
+            # A new outline section: headings of the previous one no longer apply
+            state.section_id = blocks[0].metadata.get("section_id")
+            state.heading, state.parent_id = "", ""
+
+        for unit in self._units(blocks):
+            if unit[0].kind == "heading":
+                yield from emit()
+                state.heading = unit[0].text
+                state.parent_id = new_parent(unit[0], state.heading)
+                chunk.append(unit[0])
+                continue
+
+            if not state.parent_id:
+                state.parent_id = new_parent(unit[0], "intro")
+            pieces = unit
+            if size(unit) > self.max_tokens:
+                # Too large to keep whole: fall back to item, then sentence boundaries
+                pieces = [
+                    piece for block in unit
+                    for piece in (self._split_block(block) if block.tokens + 1 > self.max_tokens else [block])
+                ]
+            elif size(chunk) + size(unit) > self.max_tokens:
+                yield from emit()
+
+            for piece in pieces:
+                if chunk and size(chunk) + piece.tokens + 1 > self.max_tokens:
+                    yield from emit()
+                chunk.append(piece)
+
+        yield from emit()
+        if pending is not None:
+            yield pending
+
+
+def make_page_splitter(config: ChunkingConfig):
+    """
+    Return a function turning a document's pages into chunks.
+
+    Args:
+        config: Chunking settings
+
+    Returns:
+        Callable taking an iterable of page Documents and yielding chunks
+    """
+    if config.method not in CHUNKING_METHODS:
+        raise ValueError(f"Unknown chunking method {config.method!r}; expected one of {CHUNKING_METHODS}")
+    if config.method == "structured":
+        split = StructuredChunker(config.max_tokens, config.min_tokens, config.tokenizer).split_pages
+    else:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            add_start_index=True,
+        )
+
+        def split(pages: Iterable[Document]) -> Iterator[Document]:
+            for page in pages:
+                yield from text_splitter.split_documents([page])
+
+    if not config.normalize:
+        return split
+
+    def normalized(pages: Iterable[Document]) -> Iterator[Document]:
+        for page in pages:
+            page.page_content = normalize_text(page.page_content)
+            yield page
+
+    return lambda pages: split(normalized(pages))
@@ -0,0 +1,159 @@
+"""Discover and load every supported document under a directory."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from queue import Empty
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.rag.loaders.chunking import ChunkingConfig, make_page_splitter
+from src.rag.loaders.pdf_loader import lazy_load_pdf_documents
+
+# Lazy (page-by-page) loader per file suffix; register new formats here
+DOCUMENT_LOADERS: Dict[str, Callable[[str | Path], Iterator[Document]]] = {
+    ".pdf": lazy_load_pdf_documents,
+}
+
+# (path, chunks, done): a batch of chunks from ``path``, or the end-of-file marker
+ChunkBatch = Tuple[Path, List[Document], bool]
+
+
+def discover_documents(root: str | Path) -> List[Path]:
+    """
+    Find every document with a registered loader under a directory.
+
+    Args:
+        root: Directory to scan recursively
+
+    Returns:
+        Sorted list of document paths
+    """
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(
+        path for path in root.rglob("*")
+        if path.is_file() and path.suffix.lower() in DOCUMENT_LOADERS
+    )
+
+
+def iter_chunks(path: str | Path, chunking: ChunkingConfig) -> Iterator[Document]:
+    """
+    Stream the chunks of one document, loading and splitting it lazily.
+
+    Pages are loaded one at a time and only the current page (or outline
+    section, for the structured chunker) is held in memory, so memory use
+    does not grow with the size of the document.
+
+    Args:
+        path: Document path
+        chunking: Chunking settings
+
+    Yields:
+        Chunk Documents in page order
+    """
+    path = Path(path)
+    loader = DOCUMENT_LOADERS[path.suffix.lower()]
+    yield from make_page_splitter(chunking)(loader(path))
+
+
+def _warn_failed(path: str | Path, error: BaseException) -> None:
+    print(f"⚠ Warning: skipping {path}, it could not be loaded: {error!r}")
+
+
+def _batched(chunks: Iterator[Document], batch_size: int) -> Iterator[List[Document]]:
+    """Group an iterator of chunks into lists of at most ``batch_size``."""
+    while batch := list(islice(chunks, batch_size)):
+        yield batch
+
+
+def _stream_to_queue(path: str, chunking: ChunkingConfig, batch_size: int, queue) -> None:
+    """
+    Worker entry point: push the chunks of one document onto a bounded queue.
+
+    ``queue.put`` blocks while the parent is behind, which is what keeps the
+    number of parsed-but-unembedded chunks bounded.
+    """
+    for batch in _batched(iter_chunks(path, chunking), batch_size):
+        queue.put((path, batch, False))
+    queue.put((path, [], True))
+
+
+def iter_chunk_batches(
+    paths: List[Path],
+    chunking: ChunkingConfig,
+    max_workers: Optional[int] = None,
+    high_water_mark: int = 256,
+) -> Iterator[ChunkBatch]:
+    """
+    Stream chunk batches for several documents, parsing them in parallel.
+
+    PDF parsing is CPU-bound pure Python, so documents are parsed in a pool
+    of worker processes that stream their chunks back through a bounded
+    queue. At most ``high_water_mark`` chunks wait in the queue regardless of
+    how large the documents are. Batches of different files may interleave;
+    each file ends with a ``done`` marker. A file that cannot be read or
+    parsed is reported and skipped: it gets no ``done`` marker, so callers
+    can tell it apart from a file that was loaded completely.
+
+    Args:
+        paths: Documents to load
+        chunking: Chunking settings
+        max_workers: Number of worker processes (defaults to the CPU count)
+        high_water_mark: Maximum number of chunks buffered between parsing
+            and embedding
+
+    Yields:
+        (path, chunks, done) tuples
+    """
+    batch_size = max(1, min(64, high_water_mark))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    if max_workers <= 1:
+        for path in paths:
+            try:
+                for batch in _batched(iter_chunks(path, chunking), batch_size):
+                    yield path, batch, False
+            except Exception as e:
+                _warn_failed(path, e)
+                continue
+            yield path, [], True
+        return
+
+    by_name = {str(path): path for path in paths}
+    # spawn: the parent may already run torch/tokenizer threads that do not survive fork
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        queue = manager.Queue(maxsize=max(1, high_water_mark // batch_size))
+        futures = {
+            executor.submit(_stream_to_queue, name, chunking, batch_size, queue): name
+            for name in by_name
+        }
+        running = dict(futures)
+        remaining = len(futures)
+        try:
+            while remaining:
+                try:
+                    name, batch, done = queue.get(timeout=0.5)
+                except Empty:
+                    # A failed worker never sends its done marker: skip its file
+                    for future, name in list(running.items()):
+                        if future.done():
+                            del running[future]
+                            if future.exception() is not None:
+                                _warn_failed(name, future.exception())
+                                remaining -= 1
+                    continue
+                remaining -= done
+                yield by_name[name], batch, done
+        finally:
+            # Unblock workers still waiting on a full queue before the pool shuts down
+            for future in futures:
+                future.cancel()
+            while not all(future.done() for future in futures):
+                try:
+                    queue.get(timeout=0.1)
+                except Empty:
+                    pass
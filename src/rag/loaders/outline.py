@@ -0,0 +1,108 @@
+"""Section metadata from a PDF's outline (bookmarks)."""
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pypdf import PdfReader
+
+
+@dataclass(frozen=True)
+class OutlineSection:
+    """One outline entry and the page it starts on."""
+
+    id: str
+    title: str
+    chapter: str
+    level: int
+    start_page: int
+
+
+def slugify(text: str) -> str:
+    """Return an ASCII, URL-style slug of ``text`` (diacritics stripped)."""
+    # "đ" has no decomposition, so it would be dropped rather than become "d"
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "section"
+
+
+def read_pdf_outline(file_path: str | Path) -> List[OutlineSection]:
+    """
+    Flatten a PDF's outline into sections in document order.
+
+    Each section's ``chapter`` is its top-level ancestor (e.g. "Depressive
+    Disorders" for "Major Depressive Disorder"). Section ids are built from
+    the chapter and title slugs, so they are stable across re-indexing.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        Sections sorted by start page; empty if the PDF has no outline
+    """
+    reader = PdfReader(str(file_path))
+    try:
+        outline = reader.outline
+    except Exception:
+        return []
+
+    sections: List[OutlineSection] = []
+    seen: Dict[str, int] = {}
+
+    def walk(items, level: int, chapter: Optional[str]) -> None:
+        current = chapter
+        for item in items:
+            if isinstance(item, list):
+                # A nested list holds the children of the preceding entry
+                walk(item, level + 1, current)
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+            except Exception:
+                continue
+            title = " ".join(str(item.title).split())
+            if not title or page is None or page < 0:
+                continue
+            current = title if level == 0 else chapter
+            base = slugify(title) if level == 0 else f"{slugify(current)}/{slugify(title)}"
+            seen[base] = seen.get(base, 0) + 1
+            section_id = base if seen[base] == 1 else f"{base}-{seen[base]}"
+            sections.append(OutlineSection(section_id, title, current, level, page))
+
+    walk(outline, 0, None)
+    # Stable sort keeps parents before children that start on the same page
+    sections.sort(key=lambda section: section.start_page)
+    return sections
+
+
+class SectionLocator:
+    """Maps page numbers to the innermost outline section covering them."""
+
+    def __init__(self, sections: List[OutlineSection]):
+        """
+        Initialize locator.
+
+        Args:
+            sections: Sections sorted by start page (see ``read_pdf_outline``)
+        """
+        self.sections = sections
+        self.start_pages = [section.start_page for section in sections]
+
+    @classmethod
+    def from_pdf(cls, file_path: str | Path) -> "SectionLocator":
+        """Build a locator from a PDF's outline."""
+        return cls(read_pdf_outline(file_path))
+
+    def locate(self, page: int) -> Optional[OutlineSection]:
+        """Return the section the page belongs to, or None before the first section."""
+        i = bisect.bisect_right(self.start_pages, page) - 1
+        return self.sections[i] if i >= 0 else None
+
+    def metadata_for(self, page: int) -> Dict[str, str]:
+        """Return the chapter/section metadata to store on chunks from ``page``."""
+        section = self.locate(page)
+        if section is None:
+            return {}
+        return {"chapter": section.chapter, "section": section.title, "section_id": section.id}
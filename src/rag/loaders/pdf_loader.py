@@ -1,9 +1,11 @@
 """PDF document loader module."""
 from pathlib import Path
 from langchain_community.document_loaders import PyPDFLoader
-from typing import List
+from typing import Iterator, List
 from langchain_core.documents import Document
 
+from src.rag.loaders.outline import SectionLocator
+
 
 def load_pdf_documents(file_path: str | Path) -> List[Document]:
     """
@@ -23,3 +25,27 @@ def load_pdf_documents(file_path: str | Path) -> List[Document]:
     docs = loader.load()
     print(f"Loaded {len(docs)} pages from {file_path.name}")
     return docs
+
+
+def lazy_load_pdf_documents(file_path: str | Path) -> Iterator[Document]:
+    """
+    Lazily load a PDF file one page at a time.
+
+    Pages are tagged with the ``chapter``, ``section`` and ``section_id`` of
+    the PDF outline entry they fall under, when the PDF has an outline.
+    
+    Args:
+        file_path: Path to the PDF file
+        
+    Yields:
+        One Document per page
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"PDF file not found: {file_path}")
+    
+    loader = PyPDFLoader(str(file_path))
+    sections = SectionLocator.from_pdf(file_path)
+    for page in loader.lazy_load():
+        page.metadata.update(sections.metadata_for(page.metadata.get("page", 0)))
+        yield page
@@ -0,0 +1,91 @@
+"""Vietnamese text normalization shared by indexing and querying."""
+import re
+import unicodedata
+
+# Combining tone marks: huyền, sắc, ngã, hỏi, nặng
+_TONE_MARKS = {"̀", "́", "̃", "̉", "̣"}
+_VOWELS = set("aăâeêioôơuưy")
+# Vowels carrying a quality mark take the tone ("ươ" takes it on "ơ")
+_MARKED_VOWELS = set("ăâêôơư")
+# Two-vowel rhymes whose tone sits on the second vowel in the modern style
+_SECOND_VOWEL_RHYMES = {"oa", "oe", "uy"}
+
+_WORD = re.compile(r"\w+")
+
+
+def _place_tone(word: str) -> str:
+    """Move a syllable's tone mark to its conventional (modern-style) vowel, e.g. "hòa" -> "hoà"."""
+    decomposed = unicodedata.normalize("NFD", word)
+    tones = [char for char in decomposed if char in _TONE_MARKS]
+    if len(tones) != 1:
+        return word
+    tone = tones[0]
+    base = unicodedata.normalize("NFC", decomposed.replace(tone, ""))
+    lower = base.lower()
+
+    start = next((i for i, char in enumerate(lower) if char in _VOWELS), None)
+    if start is None:
+        return word
+    end = start
+    while end < len(lower) and lower[end] in _VOWELS:
+        end += 1
+    # In "qu" and "gi" the u/i belong to the initial consonant ("quý", "giữ")
+    if start == 1 and lower[:2] in ("qu", "gi") and end > 2:
+        start = 2
+
+    rhyme = lower[start:end]
+    marked = [i for i in range(start, end) if lower[i] in _MARKED_VOWELS]
+    if marked:
+        position = marked[-1]
+    elif rhyme in _SECOND_VOWEL_RHYMES or len(rhyme) == 1:
+        position = end - 1
+    elif end < len(lower):
+        # Closed syllable: tone on the last vowel ("hoàn", "tuyết")
+        position = end - 1
+    elif len(rhyme) == 3:
+        position = start + 1
+    else:
+        position = start
+
+    return unicodedata.normalize(
+        "NFC", base[:position] + unicodedata.normalize("NFD", base[position]) + tone + base[position + 1:]
+    )
+
+
+def normalize_tone_marks(text: str) -> str:
+    """Place every syllable's tone mark consistently, so "hòa"/"hoà" and "thủy"/"thuỷ" match."""
+    return _WORD.sub(lambda match: match.group() if match.group().isascii() else _place_tone(match.group()), text)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize Vietnamese text before it is indexed, embedded or matched.
+
+    Applies Unicode NFC (PDFs and keyboards produce both precomposed and
+    decomposed characters) and consistent tone-mark placement. Case and
+    whitespace are preserved.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    return normalize_tone_marks(unicodedata.normalize("NFC", text))
+
+
+def segment_words(text: str) -> str:
+    """
+    Join the syllables of Vietnamese words with underscores ("trầm cảm" -> "trầm_cảm").
+
+    Needed by models trained on segmented text (e.g. PhoBERT-based
+    encoders). Requires the optional ``pyvi`` package.
+
+    Raises:
+        ImportError: If pyvi is not installed
+    """
+    try:
+        from pyvi import ViTokenizer
+    except ImportError as e:
+        raise ImportError("Vietnamese word segmentation needs pyvi: pip install pyvi") from e
+    return ViTokenizer.tokenize(text)
@@ -1,7 +1,10 @@
 """RAG pipeline initialization and utilities."""
 from config.settings import get_settings
-from src.rag.loaders.pdf_loader import load_pdf_documents
+from src.rag.loaders.chunking import ChunkingConfig
+from src.rag.loaders.directory_loader import discover_documents
 from src.rag.embeddings.vectorstore import initialize_embeddings, initialize_vector_store
+from src.rag.indexing.indexer import IndexStats, index_documents
+from src.rag.indexing.manifest import manifest_path_for
 from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import Optional
 from pathlib import Path
@@ -10,16 +13,31 @@ from pathlib import Path
 class RAGPipeline:
     """Main RAG pipeline orchestrator."""
 
-    def __init__(self):
-        """Initialize RAG pipeline with settings."""
+    def __init__(self, embedding_model: Optional[str] = None):
+        """
+        Initialize RAG pipeline with settings.
+
+        Args:
+            embedding_model: Registered embedding model to use instead of
+                ``Settings.embedding_model``; each model is indexed into its
+                own collection, so pipelines for different models can be
+                compared side by side
+        """
         self.settings = get_settings()
+        self.embedding_model = embedding_model or self.settings.embedding_model
         self.embeddings = None
         self.vector_store = None
         self.model = None
 
     def setup_embeddings(self) -> None:
         """Initialize embeddings."""
-        self.embeddings = initialize_embeddings(self.settings.embedding_model)
+        self.embeddings = initialize_embeddings(
+            self.embedding_model,
+            cache_path=self.settings.embedding_cache_path or None,
+            backend=self.settings.embedding_backend,
+            onnx_dir=self.settings.onnx_model_dir,
+            server_url=self.settings.embedding_server_url or None,
+        )
 
     def setup_vector_store(self, persist_dir: Optional[str] = None) -> None:
         """Initialize vector store."""
@@ -31,21 +49,43 @@ class RAGPipeline:
             self.embeddings,
             collection_name=self.settings.vector_store_collection,
             persist_directory=persist_dir,
+            embedding_model=self.embedding_model,
         )
+        self.persist_dir = persist_dir
 
     def setup_chat_model(self) -> None:
         """Initialize chat model."""
         self.model = ChatGoogleGenerativeAI(model=self.settings.chat_model)
         print(f"✓ Chat model initialized: {self.settings.chat_model}")
 
-    def load_and_index_documents(self, file_path: str | Path) -> None:
-        """Load documents and add to vector store."""
+    def load_and_index_documents(self, path: Optional[str | Path] = None) -> IndexStats:
+        """
+        Load documents and incrementally sync them into the vector store.
+
+        Args:
+            path: A single document or a directory to scan; defaults to
+                ``Settings.documents_dir``
+
+        Returns:
+            IndexStats describing the work done
+        """
         if not self.vector_store:
             self.setup_vector_store()
 
-        docs = load_pdf_documents(file_path)
-        self.vector_store.add_documents(docs)
-        print(f"✓ {len(docs)} documents indexed")
+        path = Path(path or self.settings.documents_dir)
+        paths = discover_documents(path) if path.is_dir() else [path]
+
+        stats = index_documents(
+            self.vector_store,
+            paths,
+            manifest_path_for(self.persist_dir, self.vector_store._collection.name),
+            chunking=ChunkingConfig.from_settings(self.settings),
+            max_workers=self.settings.ingest_workers or None,
+            high_water_mark=self.settings.ingest_high_water_mark,
+            batch_size=self.settings.ingest_batch_size or None,
+        )
+        print(f"✓ {stats.files_scanned} documents indexed ({stats.chunks_added} chunks added)")
+        return stats
 
     def initialize_all(self) -> None:
         """Initialize all components."""
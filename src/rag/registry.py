@@ -0,0 +1,117 @@
+"""Deferred component registry with background warm-up."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class ComponentRegistry:
+    """
+    Lazily constructs heavy components (models, vector stores) on first use.
+
+    Factories are registered by name and only run when a component is first
+    requested, either directly through ``get`` or by the background warm-up
+    started with ``start_warmup``. Each component is built at most once, even
+    when several threads ask for it concurrently.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._warmup: Optional[Future] = None
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Register a factory for a component.
+
+        Args:
+            name: Component name
+            factory: Zero-argument callable building the component; it may
+                call ``get`` for the components it depends on
+        """
+        with self._guard:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Return a component, building it on first use.
+
+        Args:
+            name: Component name
+
+        Returns:
+            The constructed component
+        """
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown component: {name}")
+
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                elapsed = time.perf_counter() - start
+                print(f"✓ Component '{name}' ready ({elapsed:.2f}s)")
+        return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        """Return True if the component has already been constructed."""
+        return name in self._instances
+
+    @property
+    def ready(self) -> bool:
+        """True once the warm-up has finished successfully."""
+        return (
+            self._warmup is not None
+            and self._warmup.done()
+            and self._warmup.exception() is None
+        )
+
+    def start_warmup(self, names: Optional[Iterable[str]] = None) -> Future:
+        """
+        Build components in a background thread.
+
+        Calling this more than once returns the same warm-up future, so every
+        chat session can kick it off without coordinating with the others. A
+        failed warm-up is retried on the next call.
+
+        Args:
+            names: Components to build, in order. Defaults to every
+                registered component in registration order.
+
+        Returns:
+            Future resolved when all components are built
+        """
+        with self._guard:
+            if self._warmup is not None and not (
+                self._warmup.done() and self._warmup.exception() is not None
+            ):
+                return self._warmup
+
+            order: List[str] = list(names) if names is not None else list(self._factories)
+            future: Future = Future()
+            self._warmup = future
+
+        def run() -> None:
+            try:
+                start = time.perf_counter()
+                for name in order:
+                    self.get(name)
+                print(f"✓ Warm-up complete ({time.perf_counter() - start:.2f}s)")
+                future.set_result(None)
+            except BaseException as e:
+                print(f"✗ Warm-up failed: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="component-warmup", daemon=True).start()
+        return future
+
+    async def wait_until_ready(self) -> None:
+        """Start the warm-up if needed and wait for it without blocking the event loop."""
+        await asyncio.wrap_future(self.start_warmup())
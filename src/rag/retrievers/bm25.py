@@ -0,0 +1,221 @@
+"""Compact, array-backed BM25 index persisted next to the vector store."""
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.rag.normalize import normalize_text
+from src.rag.retrievers.filters import FilterRows, SectionFilter
+from src.rag.retrievers.storage import atomic_files, with_ext
+
+# Words, keeping diagnostic codes such as "F32.1" or "296.23" in one token
+_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase normalized word tokens (Vietnamese syllables stay intact)."""
+    return _TOKEN.findall(normalize_text(text).lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the knowledge base chunks, stored as CSR arrays.
+
+    Postings are kept term-major in flat NumPy arrays (``indptr`` into
+    ``doc_ids`` and precomputed per-posting BM25 weights), so a query is a
+    handful of slice-and-add operations followed by ``argpartition`` and
+    stays well under a millisecond for corpora of this size.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[dict],
+        vocab: List[str],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+    ):
+        """Initialize from prebuilt arrays; use ``build`` or ``load`` instead."""
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.vocab = vocab
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(vocab)}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.filter_rows = FilterRows(metadatas)
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Build an index from chunk texts.
+
+        Args:
+            ids: Chunk ids (as stored in Chroma)
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25Index instance
+        """
+        counts = [Counter(tokenize(text)) for text in texts]
+        doc_len = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, counter in enumerate(counts):
+            for term, tf in counter.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        vocab = sorted(postings)
+        n_docs = len(texts)
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids = np.empty(sum(len(p) for p in postings.values()), dtype=np.int32)
+        weights = np.empty(len(doc_ids), dtype=np.float32)
+        offset = 0
+        for i, term in enumerate(vocab):
+            docs = np.array([d for d, _ in postings[term]], dtype=np.int32)
+            tf = np.array([t for _, t in postings[term]], dtype=np.float32)
+            idf = np.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1.0 - b + b * doc_len[docs] / max(avg_len, 1e-9))
+            doc_ids[offset:offset + len(docs)] = docs
+            weights[offset:offset + len(docs)] = idf * tf * (k1 + 1.0) / (tf + norm)
+            offset += len(docs)
+            indptr[i + 1] = offset
+
+        return cls(list(ids), list(texts), list(metadatas or [{} for _ in ids]), vocab, indptr, doc_ids, weights)
+
+    @classmethod
+    def from_vector_store(cls, vector_store: Chroma) -> "BM25Index":
+        """Build an index over every chunk currently in a Chroma collection."""
+        data = vector_store.get(include=["documents", "metadatas"])
+        return cls.build(data["ids"], data["documents"], [m or {} for m in data["metadatas"]])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every chunk for a query."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self.term_ids.get(term)
+            if i is not None:
+                start, end = self.indptr[i], self.indptr[i + 1]
+                scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, k: int = 10, filter: Optional[SectionFilter] = None) -> List[Tuple[int, float]]:
+        """
+        Return the top-k chunks for a query.
+
+        Args:
+            query: Query text
+            k: Number of results
+            filter: Only consider chunks passing this filter
+
+        Returns:
+            (row, score) pairs, best first, excluding chunks scoring zero
+        """
+        scores = self.scores(query)
+        rows = None
+        if filter is not None:
+            rows = self.filter_rows(filter)
+            scores = scores[rows]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(i if rows is None else rows[i]), float(scores[i]))
+            for i in top if scores[i] > 0
+        ]
+
+    def documents(self, rows: Sequence[int]) -> List[Document]:
+        """Return the chunks at the given rows as Documents."""
+        return [
+            Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+            for row in rows
+        ]
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the index as ``<path>.npz`` (arrays) and ``<path>.json`` (ids, texts, vocab).
+
+        Both files are replaced atomically, the JSON last, so a concurrent
+        ``load`` never sees a half-written or mismatched pair.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_files(with_ext(path, ".npz"), with_ext(path, ".json")) as (npz_tmp, json_tmp):
+            with open(npz_tmp, "wb") as f:
+                np.savez(f, indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights)
+            with open(json_tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas, "vocab": self.vocab},
+                    f,
+                    ensure_ascii=False,
+                )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BM25Index":
+        """Load an index written by ``save``."""
+        path = Path(path)
+        arrays = np.load(with_ext(path, ".npz"))
+        with open(with_ext(path, ".json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data["ids"], data["texts"], data["metadatas"], data["vocab"],
+            arrays["indptr"], arrays["doc_ids"], arrays["weights"],
+        )
+
+    @staticmethod
+    def exists(path: str | Path) -> bool:
+        """Return True if an index has been saved at ``path``."""
+        path = Path(path)
+        return with_ext(path, ".npz").exists() and with_ext(path, ".json").exists()
+
+
+def bm25_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """Return where a collection's BM25 index is stored, next to its Chroma directory."""
+    return Path(persist_directory).parent / f"{collection_name}.bm25"
+
+
+def load_or_build_bm25(vector_store: Chroma, path: str | Path, rebuild: bool = False) -> BM25Index:
+    """
+    Load the persisted BM25 index, rebuilding it from Chroma when asked or missing.
+
+    Args:
+        vector_store: Chroma collection the index mirrors
+        path: Index location (see ``bm25_path_for``)
+        rebuild: Force a rebuild, e.g. because indexing changed the collection
+
+    Returns:
+        BM25Index instance
+    """
+    if not rebuild and BM25Index.exists(path):
+        index = BM25Index.load(path)
+        if len(index) == vector_store._collection.count():
+            return index
+
+    index = BM25Index.from_vector_store(vector_store)
+    index.save(path)
+    print(f"✓ BM25 index built: {len(index)} chunks, {len(index.vocab)} terms")
+    return index
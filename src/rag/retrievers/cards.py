@@ -0,0 +1,364 @@
+"""Precomputed disorder knowledge cards with direct lookup by code or name."""
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_chroma import Chroma
+
+from src.rag.normalize import normalize_text
+from src.rag.retrievers.filters import find_disorder_codes, normalize_code
+from src.rag.retrievers.parents import group_parents
+from src.rag.retrievers.storage import atomic_files
+
+# Criterion letters as printed in DSM-5 criteria sets ("A. Five (or more) ...")
+_CRITERION = re.compile(r"(?m)^\s*(?=[A-H]\.\s)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _fold(text: str) -> str:
+    return _WHITESPACE.sub(" ", normalize_text(text).casefold()).strip(" .,:;!?\"'()")
+
+
+# Subsection headings of a criteria set, in English and in the Vietnamese translation
+_CRITERIA_HEADINGS = {
+    _fold(heading) for heading in ("Diagnostic Criteria", "Tiêu chuẩn chẩn đoán", "Các tiêu chuẩn chẩn đoán")
+}
+
+
+@dataclass
+class DisorderCard:
+    """Compact summary of one disorder: codes and diagnostic criteria."""
+
+    id: str
+    name: str
+    chapter: str = ""
+    codes: List[str] = field(default_factory=list)
+    criteria: List[str] = field(default_factory=list)
+    aliases: List[str] = field(default_factory=list)
+    page: Optional[str] = None  # printed page label of the criteria
+
+    def render(self) -> str:
+        """Format the card for the chat model."""
+        title = self.name + (f" ({', '.join(self.codes)})" if self.codes else "")
+        lines = [title]
+        if self.chapter:
+            lines.append(f"Chapter: {self.chapter}")
+        if self.aliases:
+            lines.append(f"Also known as: {', '.join(self.aliases)}")
+        if self.criteria:
+            lines.append("Diagnostic criteria:")
+            lines.extend(self.criteria)
+        if self.page is not None:
+            lines.append(f"[DSM-5 p.{self.page}]")
+        return "\n".join(lines)
+
+
+def extract_criteria(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Split a "Diagnostic Criteria" subsection into its lettered criteria.
+
+    Args:
+        text: Subsection text, headings included
+        max_chars: Longest criterion kept whole; longer ones are cut at a
+            word boundary and end with " …"
+
+    Returns:
+        One whitespace-collapsed string per criterion ("A. ..."), in order
+    """
+    criteria = []
+    for part in _CRITERION.split(text)[1:]:
+        criterion = _WHITESPACE.sub(" ", part).strip()
+        if len(criterion) > max_chars:
+            criterion = criterion[:max_chars].rsplit(" ", 1)[0] + " …"
+        criteria.append(criterion)
+    return criteria
+
+
+class AliasTrie:
+    """
+    Character trie over folded disorder names and aliases.
+
+    Exact names are looked up in a dict; the trie serves what a dict
+    cannot: completing a partial name ("rối loạn lo") and finding the
+    longest alias mentioned inside a free-text query.
+    """
+
+    _END = "\0"
+
+    def __init__(self):
+        """Initialize an empty trie."""
+        self.root: Dict[str, dict] = {}
+
+    def insert(self, alias: str, card_id: str) -> None:
+        """Add an (already folded) alias for a card."""
+        node = self.root
+        for char in alias:
+            node = node.setdefault(char, {})
+        ids = node.setdefault(self._END, [])
+        if card_id not in ids:
+            ids.append(card_id)
+
+    def complete(self, prefix: str, limit: int = 5) -> List[str]:
+        """Return up to ``limit`` card ids whose aliases start with ``prefix``, shortest alias first."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        found: List[str] = []
+        frontier = [node]
+        while frontier and len(found) < limit:
+            next_frontier = []
+            for current in frontier:
+                for card_id in current.get(self._END, ()):
+                    if card_id not in found:
+                        found.append(card_id)
+                next_frontier.extend(child for char, child in current.items() if char != self._END)
+            frontier = next_frontier
+        return found[:limit]
+
+    def mentions(self, text: str) -> Iterator[Tuple[int, int, List[str]]]:
+        """
+        Yield the longest alias starting at each word of ``text``.
+
+        Args:
+            text: Folded text
+
+        Yields:
+            (start, end, card_ids) per match
+        """
+        for start in range(len(text)):
+            if start and text[start - 1].isalnum():
+                continue
+            node, match = self.root, None
+            for end in range(start, len(text)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                boundary = end + 1 == len(text) or not text[end + 1].isalnum()
+                if self._END in node and boundary:
+                    match = (start, end + 1, node[self._END])
+            if match:
+                yield match
+
+
+class DisorderCards:
+    """
+    Disorder cards keyed by disorder code and by English/Vietnamese names.
+
+    Codes and folded names resolve through a dict, so the common lookups
+    ("F32", "trầm cảm", "insomnia disorder") cost one hash probe and no
+    embedding or vector search; an ``AliasTrie`` handles partial names and
+    names embedded in longer questions.
+    """
+
+    def __init__(self, cards: Dict[str, DisorderCard]):
+        """
+        Initialize from ``{card_id: DisorderCard}``; use ``build`` or ``load`` instead.
+        """
+        self.cards = cards
+        self.keys: Dict[str, str] = {}
+        self.trie = AliasTrie()
+        for card_id, card in cards.items():
+            for code in card.codes:
+                self.keys.setdefault(code, card_id)
+                # "F32" finds the first card coded F32.x
+                self.keys.setdefault(code.split(".")[0], card_id)
+            for name in [card.name, *card.aliases]:
+                folded = _fold(name)
+                if folded:
+                    self.keys.setdefault(folded, card_id)
+                    self.trie.insert(folded, card_id)
+
+    @classmethod
+    def build(
+        cls,
+        texts: Sequence[str],
+        metadatas: Sequence[dict],
+        aliases: Optional[Sequence[dict]] = None,
+        max_criterion_chars: int = 600,
+    ) -> "DisorderCards":
+        """
+        Build cards from the chunks of the structured chunker.
+
+        Every outline section with a "Diagnostic Criteria" ("Tiêu chuẩn chẩn
+        đoán") subsection becomes a card. Its codes are those printed in the
+        criteria (coding notes, specifiers), or else those mentioned anywhere
+        in the section.
+
+        Args:
+            texts: Chunk texts
+            metadatas: Chunk metadata (``section_id``, ``section``, ``parent_id``)
+            aliases: Alias entries (see ``load_disorder_aliases``), matched to
+                a card by any of their names or, failing that, by code
+            max_criterion_chars: Longest criterion kept whole
+
+        Returns:
+            DisorderCards instance
+        """
+        codes: Dict[str, List[str]] = {}
+        for text, metadata in zip(texts, metadatas):
+            section_id = (metadata or {}).get("section_id")
+            if section_id:
+                section_codes = codes.setdefault(section_id, [])
+                section_codes.extend(code for code in find_disorder_codes(text) if code not in section_codes)
+
+        cards: Dict[str, DisorderCard] = {}
+        for _, text, metadata in group_parents(texts, metadatas):
+            section_id = metadata.get("section_id")
+            if not section_id or _fold(metadata.get("heading", "")) not in _CRITERIA_HEADINGS:
+                continue
+            criteria = extract_criteria(text, max_criterion_chars)
+            if not criteria or section_id in cards:
+                continue
+            name = metadata.get("section", "")
+            page = metadata.get("page_label")
+            if page is None and metadata.get("page") is not None:
+                page = metadata["page"] + 1
+            card_codes = find_disorder_codes(text) or codes.get(section_id, [])
+            cards[section_id] = DisorderCard(
+                id=section_id,
+                name=name,
+                chapter=metadata.get("chapter", ""),
+                codes=card_codes,
+                criteria=criteria,
+                aliases=_aliases_for(name, card_codes, aliases or []),
+                page=str(page) if page is not None else None,
+            )
+        return cls(cards)
+
+    @classmethod
+    def from_vector_store(cls, vector_store: Chroma, aliases: Optional[Sequence[dict]] = None) -> "DisorderCards":
+        """Build cards from every chunk currently in a Chroma collection."""
+        data = vector_store.get(include=["documents", "metadatas"])
+        return cls.build(data["documents"], data["metadatas"], aliases)
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def lookup(self, name_or_code: str) -> Optional[DisorderCard]:
+        """
+        Return the card for a disorder code or name.
+
+        Tries, in order: the code, the exact (folded) name or alias, the
+        longest known name mentioned in the text, and a unique completion
+        of a partial name.
+
+        Args:
+            name_or_code: E.g. "F41.1", "Generalized Anxiety Disorder",
+                "rối loạn lo âu lan toả"
+
+        Returns:
+            DisorderCard, or None if nothing matches unambiguously
+        """
+        card_id = self._resolve(name_or_code)
+        return self.cards.get(card_id) if card_id else None
+
+    def _resolve(self, name_or_code: str) -> Optional[str]:
+        folded = _fold(name_or_code)
+        card_id = self.keys.get(normalize_code(name_or_code)) or self.keys.get(folded)
+        if card_id:
+            return card_id
+        for code in find_disorder_codes(name_or_code.upper()):
+            card_id = self.keys.get(code) or self.keys.get(code.split(".")[0])
+            if card_id:
+                return card_id
+        # The longest known name inside a longer question
+        mentions = sorted(self.trie.mentions(folded), key=lambda match: match[0] - match[1])
+        if mentions:
+            card_ids = mentions[0][2]
+            return card_ids[0] if len(card_ids) == 1 else None
+        completions = self.trie.complete(folded, limit=2)
+        return completions[0] if len(completions) == 1 else None
+
+    def suggest(self, name: str, limit: int = 5) -> List[str]:
+        """Return the names of cards whose names or aliases start with ``name``."""
+        return [self.cards[card_id].name for card_id in self.trie.complete(_fold(name), limit)]
+
+    def save(self, path: str | Path) -> None:
+        """Persist the cards as JSON, replacing any previous file atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_files(path) as (tmp_path,):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"cards": [asdict(card) for card in self.cards.values()]}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "DisorderCards":
+        """Load cards written by ``save``."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls({card["id"]: DisorderCard(**card) for card in json.load(f)["cards"]})
+
+
+def _aliases_for(name: str, codes: Sequence[str], entries: Sequence[dict]) -> List[str]:
+    """
+    Return the alias entry names for a card, without its own name.
+
+    An entry matches if one of its names (in either language) is the card's
+    name. Otherwise an entry sharing a code matches, provided no other entry
+    does: the outline may use a translation the entry does not list.
+    """
+    folded = _fold(name)
+    matched = [entry for entry in entries if folded in {_fold(alias) for alias in entry.get("names", [])}]
+    if not matched:
+        card_codes = set(codes)
+        matched = [entry for entry in entries if card_codes & set(entry.get("codes", []))]
+    if len(matched) != 1:
+        return []
+    return [alias for alias in matched[0]["names"] if _fold(alias) != folded]
+
+
+def load_disorder_aliases(path: str | Path) -> List[dict]:
+    """
+    Load alias entries from JSON, or nothing if the file is missing.
+
+    The file is a list of ``{"codes": [...], "names": [...]}`` entries, one
+    per disorder: its ICD-10-CM codes (only those no other disorder uses)
+    and its names in English and Vietnamese, DSM-5 names first.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def disorder_cards_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """Return where a collection's disorder cards are stored, next to its Chroma directory."""
+    return Path(persist_directory).parent / f"{collection_name}.cards.json"
+
+
+def load_or_build_disorder_cards(
+    vector_store: Chroma,
+    path: str | Path,
+    aliases_path: Optional[str | Path] = None,
+    rebuild: bool = False,
+) -> DisorderCards:
+    """
+    Load the persisted cards, rebuilding them when asked, missing or older than the alias file.
+
+    Args:
+        vector_store: Chroma collection the cards are extracted from
+        path: Cards location (see ``disorder_cards_path_for``)
+        aliases_path: JSON file of extra names per disorder
+        rebuild: Force a rebuild, e.g. because indexing changed the collection
+
+    Returns:
+        DisorderCards instance
+    """
+    path = Path(path)
+    aliases_changed = (
+        aliases_path is not None and Path(aliases_path).exists() and path.exists()
+        and Path(aliases_path).stat().st_mtime > path.stat().st_mtime
+    )
+    if not rebuild and not aliases_changed and path.exists():
+        return DisorderCards.load(path)
+
+    cards = DisorderCards.from_vector_store(
+        vector_store, load_disorder_aliases(aliases_path) if aliases_path else None
+    )
+    cards.save(path)
+    print(f"✓ Disorder cards built: {len(cards)} disorders, {len(cards.keys)} lookup keys")
+    return cards
@@ -0,0 +1,171 @@
+"""Pack retrieved chunks into a token-budgeted context block with compact citations."""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from src.rag.tokens import TokenCounter
+
+# Chunks this close together on a page are joined into one passage
+_ADJACENT_GAP = 2
+
+# Places where a truncated passage may end: line breaks, then sentence ends
+_LINE_END = re.compile(r"\n")
+_SENTENCE_END = re.compile(r"[.;:!?](?=\s)")
+
+
+@dataclass
+class Passage:
+    """A contiguous span of one page, merged from one or more chunks."""
+
+    source: str
+    page: Optional[int]
+    start: Optional[int]
+    text: str
+    rank: int
+    metadata: dict
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+    def extend(self, start: int, text: str) -> None:
+        """Append a chunk that starts inside or right after this passage."""
+        overlap = self.end - start
+        if overlap >= 0:
+            self.text += text[overlap:]
+        else:
+            self.text += " " + text
+
+
+class ContextBuilder:
+    """
+    Turns retrieved Documents into the text handed to the chat model.
+
+    Chunks from the same page that overlap (``chunk_overlap``) or touch are
+    merged back into one passage, duplicates are dropped, and passages are
+    packed best-first until ``token_budget`` is spent. A passage that does
+    not fit is cut at the last line or sentence end that does, never
+    mid-word. Each passage is preceded by a short citation such as
+    ``[1] DSM-5.pdf p.161 · Depressive Disorders``.
+    """
+
+    def __init__(self, token_budget: int = 1200, encoding: str = "o200k_base", min_passage_tokens: int = 48):
+        """
+        Initialize context builder.
+
+        Args:
+            token_budget: Maximum tokens of the assembled context
+            encoding: Tokenizer used to count tokens (see ``TokenCounter``)
+            min_passage_tokens: Smallest truncated passage worth including
+        """
+        self.token_budget = token_budget
+        self.min_passage_tokens = min_passage_tokens
+        self.tokens = TokenCounter(encoding)
+
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        return self.tokens.count(text)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to at most ``max_tokens``, ending on a line or sentence boundary."""
+        head = self.tokens.head(text, max_tokens)
+        for boundary in (_LINE_END, _SENTENCE_END):
+            ends = [match.end() for match in boundary.finditer(head)]
+            # Only accept a boundary that keeps most of what fits
+            if ends and ends[-1] >= len(head) // 2:
+                return head[:ends[-1]].rstrip() + " …"
+        cut = head.rfind(" ")
+        return (head[:cut] if cut > 0 else head).rstrip() + " …"
+
+    @staticmethod
+    def merge(docs: Sequence[Document]) -> List[Passage]:
+        """
+        Merge overlapping and adjacent chunks of the same page and drop duplicates.
+
+        Args:
+            docs: Retrieved chunks, best first
+
+        Returns:
+            Passages ordered by the best rank among their chunks
+        """
+        groups: Dict[Tuple[str, Optional[int]], List[Tuple[int, Document]]] = {}
+        seen = set()
+        for rank, doc in enumerate(docs):
+            key = doc.id or doc.page_content
+            if key in seen:
+                continue
+            seen.add(key)
+            metadata = doc.metadata or {}
+            groups.setdefault((str(metadata.get("source", "")), metadata.get("page")), []).append((rank, doc))
+
+        passages: List[Passage] = []
+        for (source, page), members in groups.items():
+            positioned = sorted(
+                (m for m in members if m[1].metadata.get("start_index") is not None),
+                key=lambda m: m[1].metadata["start_index"],
+            )
+            unpositioned = [m for m in members if m[1].metadata.get("start_index") is None]
+
+            current: Optional[Passage] = None
+            for rank, doc in positioned:
+                start = doc.metadata["start_index"]
+                if current is not None and start - current.end <= _ADJACENT_GAP:
+                    if start + len(doc.page_content) > current.end:
+                        current.extend(start, doc.page_content)
+                    current.rank = min(current.rank, rank)
+                    continue
+                current = Passage(source, page, start, doc.page_content, rank, doc.metadata)
+                passages.append(current)
+            for rank, doc in unpositioned:
+                passages.append(Passage(source, page, None, doc.page_content, rank, doc.metadata))
+
+        return sorted(passages, key=lambda passage: passage.rank)
+
+    @staticmethod
+    def citation(index: int, passage: Passage) -> str:
+        """Return a compact citation line, e.g. ``[1] DSM-5.pdf p.161 · Depressive Disorders``."""
+        parts = [f"[{index}]"]
+        if passage.source:
+            parts.append(Path(passage.source).name)
+        label = passage.metadata.get("page_label")
+        if label is None and passage.page is not None:
+            label = passage.page + 1
+        if label is not None:
+            parts.append(f"p.{label}")
+        section = passage.metadata.get("section") or passage.metadata.get("chapter")
+        line = " ".join(parts)
+        return f"{line} · {section}" if section else line
+
+    def build(self, docs: Sequence[Document], token_budget: Optional[int] = None) -> str:
+        """
+        Assemble the context for the chat model.
+
+        Args:
+            docs: Retrieved chunks, best first
+            token_budget: Override of the builder's ``token_budget``
+
+        Returns:
+            Cited passages separated by blank lines, within ``token_budget``
+        """
+        blocks: List[str] = []
+        remaining = token_budget or self.token_budget
+        for passage in self.merge(docs):
+            citation = self.citation(len(blocks) + 1, passage)
+            # The joining blank line costs about one token
+            available = remaining - self.count_tokens(citation) - 2
+            if available <= 0:
+                break
+            text = passage.text.strip()
+            tokens = self.count_tokens(text)
+            if tokens > available:
+                if available < self.min_passage_tokens:
+                    continue
+                # Leave room for the ellipsis marking the cut
+                text = self._truncate(text, available - 2)
+                tokens = self.count_tokens(text)
+            blocks.append(f"{citation}\n{text}")
+            remaining = available - tokens
+        return "\n\n".join(blocks)
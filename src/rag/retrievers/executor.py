@@ -0,0 +1,98 @@
+"""Bounded thread pool for running retrieval work off the event loop."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class RetrievalOverloadedError(RuntimeError):
+    """Raised when too many retrieval jobs are already waiting."""
+
+
+class RetrievalExecutor:
+    """
+    Runs CPU-bound retrieval (query encoding, vector search) on a dedicated pool.
+
+    Chainlit serves every session from one asyncio loop, so encoding a query
+    on the loop thread stalls all other users. Jobs submitted here run on a
+    fixed number of worker threads (sentence-transformers and Chroma release
+    the GIL during the heavy parts) and the loop only awaits the result. The
+    wait queue is bounded: beyond ``max_queue`` waiting jobs new submissions
+    fail fast instead of piling up latency.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64):
+        """
+        Initialize executor.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Maximum number of jobs waiting for a worker
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker thread."""
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        """Number of jobs currently running."""
+        return self._active
+
+    def _track(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            RetrievalOverloadedError: If ``max_queue`` jobs are already waiting
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise RetrievalOverloadedError(
+                    f"Retrieval queue full ({self._queued} waiting, {self._active} running)"
+                )
+            self._queued += 1
+
+        future = self._executor.submit(self._track, fn, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A job cancelled before it started never reaches _track
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth and job counters."""
+        return {
+            "queue_depth": self._queued,
+            "active": self._active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,225 @@
+"""Chapter / disorder-code filters backed by a precomputed section index."""
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from src.rag.normalize import normalize_text
+from src.rag.retrievers.storage import atomic_files
+
+# ICD-10-CM codes as printed in DSM-5 ("F32.1", "Z63.0") and the older
+# ICD-9-CM codes next to them ("296.21")
+_DISORDER_CODE = re.compile(r"\b(?:[FGZR]\d{2}(?:\.[0-9]{1,3})?|[23]\d{2}\.\d{1,2})\b")
+
+
+def normalize_code(code: str) -> str:
+    """Normalize a disorder code as typed by a user ("(f32.1)" -> "F32.1")."""
+    return code.strip().strip("()[]").upper()
+
+
+def find_disorder_codes(text: str) -> List[str]:
+    """Return the distinct disorder codes mentioned in a text, in order."""
+    return list(dict.fromkeys(_DISORDER_CODE.findall(text)))
+
+
+def _fold(text: str) -> str:
+    return normalize_text(text).casefold().strip()
+
+
+@dataclass(frozen=True)
+class SectionFilter:
+    """Restricts retrieval to chunks from some chapters and/or sections."""
+
+    chapters: FrozenSet[str] = frozenset()
+    section_ids: FrozenSet[str] = frozenset()
+
+    def matches(self, metadata: dict) -> bool:
+        """Return True if a chunk with this metadata passes the filter."""
+        if self.chapters and metadata.get("chapter") not in self.chapters:
+            return False
+        if self.section_ids and metadata.get("section_id") not in self.section_ids:
+            return False
+        return True
+
+    def to_where(self) -> Optional[dict]:
+        """Return the equivalent Chroma ``where`` clause."""
+        conditions = []
+        if self.chapters:
+            conditions.append({"chapter": {"$in": sorted(self.chapters)}})
+        if self.section_ids:
+            conditions.append({"section_id": {"$in": sorted(self.section_ids)}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class FilterRows:
+    """Caches which rows of an index pass each filter, so repeated filters cost nothing."""
+
+    def __init__(self, metadatas: Sequence[dict], max_entries: int = 256):
+        """
+        Initialize cache.
+
+        Args:
+            metadatas: Metadata of every row of the index
+            max_entries: Distinct filters kept before the cache is reset
+        """
+        self.metadatas = metadatas
+        self.max_entries = max_entries
+        self._rows: Dict[SectionFilter, np.ndarray] = {}
+
+    def __call__(self, section_filter: SectionFilter) -> np.ndarray:
+        """Return the (sorted) rows whose metadata passes ``section_filter``."""
+        rows = self._rows.get(section_filter)
+        if rows is None:
+            rows = np.fromiter(
+                (i for i, metadata in enumerate(self.metadatas) if section_filter.matches(metadata)),
+                dtype=np.int64,
+            )
+            if len(self._rows) >= self.max_entries:
+                self._rows.clear()
+            self._rows[section_filter] = rows
+        return rows
+
+
+class SectionIndex:
+    """
+    Chapters, sections and the disorder codes each section mentions.
+
+    Built from the chunk metadata written at ingestion (see
+    ``src.rag.loaders.outline``) and used to turn a chapter name or disorder
+    code from the agent into a ``SectionFilter``.
+    """
+
+    def __init__(self, sections: Dict[str, dict]):
+        """
+        Initialize from ``{section_id: {"title", "chapter", "codes"}}``; use ``build`` or ``load`` instead.
+        """
+        self.sections = sections
+        self.chapters = sorted({section["chapter"] for section in sections.values()})
+        self.code_sections: Dict[str, List[str]] = {}
+        for section_id, section in sections.items():
+            for code in section["codes"]:
+                self.code_sections.setdefault(code, []).append(section_id)
+
+    @classmethod
+    def build(cls, texts: Sequence[str], metadatas: Sequence[dict]) -> "SectionIndex":
+        """
+        Build the index from chunk texts and metadata.
+
+        Args:
+            texts: Chunk texts
+            metadatas: Chunk metadata (chunks without ``section_id`` are ignored)
+
+        Returns:
+            SectionIndex instance
+        """
+        sections: Dict[str, dict] = {}
+        for text, metadata in zip(texts, metadatas):
+            section_id = (metadata or {}).get("section_id")
+            if not section_id:
+                continue
+            section = sections.setdefault(
+                section_id, {"title": metadata.get("section", ""), "chapter": metadata.get("chapter", ""), "codes": []}
+            )
+            for code in find_disorder_codes(text):
+                if code not in section["codes"]:
+                    section["codes"].append(code)
+        return cls(sections)
+
+    @classmethod
+    def from_vector_store(cls, vector_store: Chroma) -> "SectionIndex":
+        """Build the index over every chunk currently in a Chroma collection."""
+        data = vector_store.get(include=["documents", "metadatas"])
+        return cls.build(data["documents"], data["metadatas"])
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def resolve(self, chapter: Optional[str] = None, disorder_code: Optional[str] = None) -> Optional[SectionFilter]:
+        """
+        Turn a chapter name and/or disorder code into a filter.
+
+        Chapters match case-insensitively, exactly or by substring
+        ("depressive" matches "Depressive Disorders"). Codes match exactly or
+        as a prefix ("F32" matches "F32.0", "F32.1", ...).
+
+        Args:
+            chapter: Chapter name or part of it
+            disorder_code: ICD-10-CM or ICD-9-CM code
+
+        Returns:
+            SectionFilter, or None if neither argument was given
+
+        Raises:
+            ValueError: If the chapter or code is not in the index
+        """
+        chapters: FrozenSet[str] = frozenset()
+        section_ids: FrozenSet[str] = frozenset()
+
+        if chapter:
+            wanted = _fold(chapter)
+            exact = [name for name in self.chapters if _fold(name) == wanted]
+            chapters = frozenset(exact or [name for name in self.chapters if wanted in _fold(name)])
+            if not chapters:
+                raise ValueError(f"Unknown chapter {chapter!r}; known chapters: {', '.join(self.chapters)}")
+
+        if disorder_code:
+            code = normalize_code(disorder_code)
+            matched = self.code_sections.get(code) or [
+                section_id
+                for known, ids in self.code_sections.items() if known.startswith(code)
+                for section_id in ids
+            ]
+            if not matched:
+                raise ValueError(f"Disorder code {disorder_code!r} does not appear in the knowledge base")
+            section_ids = frozenset(matched)
+
+        if not chapters and not section_ids:
+            return None
+        return SectionFilter(chapters, section_ids)
+
+    def save(self, path: str | Path) -> None:
+        """Persist the index as JSON, replacing any previous file atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_files(path) as (tmp_path,):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sections": self.sections}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SectionIndex":
+        """Load an index written by ``save``."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["sections"])
+
+
+def section_index_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """Return where a collection's section index is stored, next to its Chroma directory."""
+    return Path(persist_directory).parent / f"{collection_name}.sections.json"
+
+
+def load_or_build_section_index(vector_store: Chroma, path: str | Path, rebuild: bool = False) -> SectionIndex:
+    """
+    Load the persisted section index, rebuilding it from Chroma when asked or missing.
+
+    Args:
+        vector_store: Chroma collection the index describes
+        path: Index location (see ``section_index_path_for``)
+        rebuild: Force a rebuild, e.g. because indexing changed the collection
+
+    Returns:
+        SectionIndex instance
+    """
+    path = Path(path)
+    if not rebuild and path.exists():
+        return SectionIndex.load(path)
+
+    index = SectionIndex.from_vector_store(vector_store)
+    index.save(path)
+    print(f"✓ Section index built: {len(index.chapters)} chapters, {len(index)} sections")
+    return index
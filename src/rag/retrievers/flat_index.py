@@ -0,0 +1,255 @@
+"""Exact nearest-neighbour search over a memory-mapped NumPy mirror of the vector store."""
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.rag.retrievers.filters import FilterRows, SectionFilter
+from src.rag.retrievers.storage import atomic_files, with_ext
+
+FLAT_INDEX_DTYPES = ("float32", "float16")
+
+# Rows scored per block when the matrix is float16 (NumPy has no float16 BLAS)
+_BLOCK_ROWS = 4096
+
+
+def _distance_space(vector_store: Chroma) -> str:
+    """Return the collection's distance function (Chroma defaults to squared L2)."""
+    return (vector_store._collection.metadata or {}).get("hnsw:space", "l2")
+
+
+class FlatVectorIndex:
+    """
+    Brute-force vector index over a contiguous matrix of every chunk vector.
+
+    For a few thousand vectors a single matrix-vector product followed by
+    ``argpartition`` is both faster than Chroma's HNSW path and exact. The
+    matrix is saved as ``.npy`` and loaded with ``mmap_mode="r"``, so every
+    worker process on a host shares the same page-cache copy.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[dict],
+        matrix: np.ndarray,
+        space: str = "l2",
+    ):
+        """
+        Initialize from prebuilt arrays; use ``from_vector_store`` or ``load`` instead.
+
+        Args:
+            ids: Chunk ids, one per matrix row
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            matrix: (n, dimension) vectors; rows are unit length for ``cosine``
+            space: Chroma distance function the ranking reproduces
+                (``l2``, ``cosine`` or ``ip``)
+        """
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.matrix = matrix
+        self.space = space
+        self.filter_rows = FilterRows(metadatas)
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        # ||x||^2 turns "min squared L2" into "max 2·x·q - ||x||^2"
+        self.half_sq_norms = None
+        if space == "l2":
+            self.half_sq_norms = 0.5 * np.einsum("ij,ij->i", matrix, matrix, dtype=np.float32)
+
+    @classmethod
+    def from_vector_store(cls, vector_store: Chroma, dtype: str = "float32") -> "FlatVectorIndex":
+        """
+        Copy every vector of a Chroma collection into a flat index.
+
+        Args:
+            vector_store: Chroma collection to mirror
+            dtype: ``float32`` or ``float16`` (half the memory, same ranking
+                in practice)
+
+        Returns:
+            FlatVectorIndex instance
+        """
+        if dtype not in FLAT_INDEX_DTYPES:
+            raise ValueError(f"Unsupported flat index dtype {dtype!r}; expected one of {FLAT_INDEX_DTYPES}")
+        space = _distance_space(vector_store)
+        data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+        dimension = len(data["embeddings"][0]) if len(data["embeddings"]) else 0
+        matrix = np.asarray(data["embeddings"], dtype=np.float32).reshape(len(data["ids"]), dimension)
+        if space == "cosine":
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return cls(
+            list(data["ids"]),
+            list(data["documents"]),
+            [m or {} for m in data["metadatas"]],
+            np.ascontiguousarray(matrix, dtype=dtype),
+            space,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, vector: Sequence[float], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return a similarity score per chunk (higher is closer).
+
+        Args:
+            vector: Query embedding
+            rows: Only score these rows (the result is aligned with ``rows``)
+
+        Returns:
+            Scores as float32
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        if self.space == "cosine":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            scores = matrix @ query
+        else:
+            scores = np.empty(len(matrix), dtype=np.float32)
+            for start in range(0, len(matrix), _BLOCK_ROWS):
+                block = matrix[start:start + _BLOCK_ROWS].astype(np.float32)
+                scores[start:start + len(block)] = block @ query
+
+        if self.half_sq_norms is not None:
+            scores -= self.half_sq_norms if rows is None else self.half_sq_norms[rows]
+        return scores
+
+    def search(
+        self, vector: Sequence[float], k: int = 4, filter: Optional[SectionFilter] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the exact top-k chunks for a query vector.
+
+        Args:
+            vector: Query embedding
+            k: Number of results
+            filter: Only consider chunks passing this filter; the other rows
+                are never scored
+
+        Returns:
+            (row, score) pairs, best first
+        """
+        rows = self.filter_rows(filter) if filter is not None else None
+        scores = self.scores(vector, rows)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is None:
+            return [(int(i), float(scores[i])) for i in top]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(
+        self, vector: Sequence[float], k: int = 4, filter: Optional[SectionFilter] = None
+    ) -> List[Document]:
+        """Return the top-k chunks as Documents, like ``Chroma.similarity_search_by_vector``."""
+        return self.documents([row for row, _ in self.search(vector, k, filter)])
+
+    def vectors(self, ids: Sequence[str]) -> Optional[np.ndarray]:
+        """Return the stored vectors of some chunks as float32, or None if any id is unknown."""
+        rows = [self.rows.get(chunk_id) for chunk_id in ids]
+        if None in rows:
+            return None
+        return np.asarray(self.matrix[rows], dtype=np.float32)
+
+    def documents(self, rows: Sequence[int]) -> List[Document]:
+        """Return the chunks at the given rows as Documents."""
+        return [
+            Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+            for row in rows
+        ]
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the index as ``<path>.npy`` (matrix) and ``<path>.json`` (ids, texts, metadata).
+
+        The files are written aside and moved into place, the JSON last, so
+        processes that memory-mapped the old matrix keep reading it (instead
+        of faulting on a truncated file) and ``load`` never pairs a new
+        matrix with old ids.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_files(with_ext(path, ".npy"), with_ext(path, ".json")) as (npy_tmp, json_tmp):
+            # Through a file object: np.save would append ".npy" to the temporary name
+            with open(npy_tmp, "wb") as f:
+                np.save(f, self.matrix)
+            with open(json_tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas, "space": self.space},
+                    f,
+                    ensure_ascii=False,
+                )
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "FlatVectorIndex":
+        """
+        Load an index written by ``save``.
+
+        Args:
+            path: Index location
+            mmap: Memory-map the matrix read-only instead of reading it into
+                private memory
+
+        Returns:
+            FlatVectorIndex instance
+        """
+        path = Path(path)
+        matrix = np.load(with_ext(path, ".npy"), mmap_mode="r" if mmap else None)
+        with open(with_ext(path, ".json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["texts"], data["metadatas"], matrix, data["space"])
+
+    @staticmethod
+    def exists(path: str | Path) -> bool:
+        """Return True if an index has been saved at ``path``."""
+        path = Path(path)
+        return with_ext(path, ".npy").exists() and with_ext(path, ".json").exists()
+
+
+def flat_index_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """Return where a collection's flat vector index is stored, next to its Chroma directory."""
+    return Path(persist_directory).parent / f"{collection_name}.flat"
+
+
+def load_or_build_flat_index(
+    vector_store: Chroma,
+    path: str | Path,
+    dtype: str = "float32",
+    rebuild: bool = False,
+) -> Optional[FlatVectorIndex]:
+    """
+    Load the persisted flat index, rebuilding it from Chroma when asked or stale.
+
+    Args:
+        vector_store: Chroma collection the index mirrors
+        path: Index location (see ``flat_index_path_for``)
+        dtype: Matrix dtype for a rebuild
+        rebuild: Force a rebuild, e.g. because indexing changed the collection
+
+    Returns:
+        FlatVectorIndex instance, or None if the collection is empty
+    """
+    count = vector_store._collection.count()
+    if count == 0:
+        return None
+
+    if not rebuild and FlatVectorIndex.exists(path):
+        index = FlatVectorIndex.load(path)
+        if len(index) == count and index.matrix.dtype == np.dtype(dtype):
+            return index
+
+    index = FlatVectorIndex.from_vector_store(vector_store, dtype)
+    index.save(path)
+    print(f"✓ Flat vector index built: {len(index)} x {index.matrix.shape[1]} {dtype}")
+    # Reopen memory-mapped so the freshly built copy is shared like a loaded one
+    return FlatVectorIndex.load(path)
@@ -0,0 +1,40 @@
+"""Rank fusion for combining dense and sparse retrieval results."""
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+
+def document_key(doc: Document) -> str:
+    """Return a stable identity for a retrieved chunk (its id, else its content)."""
+    return doc.id or doc.page_content
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Document]:
+    """
+    Merge ranked result lists with reciprocal-rank fusion.
+
+    Each document scores ``sum(weight / (k + rank))`` over the lists it
+    appears in, which needs no score calibration between BM25 and cosine
+    similarity.
+
+    Args:
+        rankings: Result lists, best first
+        k: RRF damping constant (60 in the original paper)
+        weights: Optional weight per list
+
+    Returns:
+        Deduplicated Documents ordered by fused score
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
@@ -0,0 +1,62 @@
+"""Maximal-marginal-relevance selection for diverse retrieval results."""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float],
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """
+    Greedily pick k candidates that are relevant but not redundant.
+
+    Each step takes the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max_similarity_to_selected``.
+    The candidate-candidate cosine similarities come from a single matrix
+    product, and the running "most similar selected" vector is updated with
+    ``np.maximum``, so there is no per-pair Python work: 50 candidates take
+    well under a millisecond.
+
+    Args:
+        query_vector: Query embedding
+        candidates: (n, dimension) candidate embeddings
+        k: Number of candidates to pick
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+        relevance: Relevance per candidate (e.g. reranker scores scaled to
+            [0, 1]); defaults to cosine similarity with the query
+
+    Returns:
+        Indices into ``candidates``, in selection order
+    """
+    matrix = np.asarray(candidates, dtype=np.float32)
+    k = min(k, len(matrix))
+    if k <= 0:
+        return []
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    if relevance is None:
+        query = np.asarray(query_vector, dtype=np.float32)
+        relevance = matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+
+    similarity = matrix @ matrix.T
+    weighted_relevance = lambda_mult * relevance
+    first = int(np.argmax(relevance))
+    selected = [first]
+    redundancy = similarity[first].copy()
+    available = np.ones(len(matrix), dtype=bool)
+    available[first] = False
+
+    while len(selected) < k:
+        scores = weighted_relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
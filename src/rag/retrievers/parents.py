@@ -0,0 +1,151 @@
+"""Memory-mapped parent-section store for small-to-big retrieval."""
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.rag.retrievers.storage import atomic_files, with_ext
+
+
+class ParentDocStore:
+    """
+    Read-only key-value store of parent sections, keyed by ``parent_id``.
+
+    Parent texts are concatenated in one UTF-8 file (``<path>.bin``) that is
+    memory-mapped, with offsets and metadata in ``<path>.json``. Lookups
+    slice the mapping, so worker processes share the pages and nothing is
+    read until a parent is actually returned.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Open a store written by ``write``.
+
+        Args:
+            path: Store location (without extension)
+        """
+        self.path = Path(path)
+        with open(with_ext(self.path, ".json"), "r", encoding="utf-8") as f:
+            self.index: Dict[str, Tuple[int, int, dict]] = json.load(f)
+        self._file = open(with_ext(self.path, ".bin"), "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: nothing to map
+            self._data = b""
+
+    @staticmethod
+    def write(path: str | Path, parents: Iterable[Tuple[str, str, dict]]) -> None:
+        """
+        Write a store atomically; readers holding the old mapping keep working.
+
+        Args:
+            path: Store location (without extension)
+            parents: (parent_id, text, metadata) tuples
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index: Dict[str, Tuple[int, int, dict]] = {}
+        with atomic_files(with_ext(path, ".bin"), with_ext(path, ".json")) as (bin_tmp, json_tmp):
+            with open(bin_tmp, "wb") as f:
+                offset = 0
+                for parent_id, text, metadata in parents:
+                    data = text.encode("utf-8")
+                    f.write(data)
+                    index[parent_id] = (offset, len(data), metadata)
+                    offset += len(data)
+            with open(json_tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+
+    @staticmethod
+    def exists(path: str | Path) -> bool:
+        """Return True if a store has been written at ``path``."""
+        path = Path(path)
+        return with_ext(path, ".bin").exists() and with_ext(path, ".json").exists()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, parent_id: str) -> bool:
+        return parent_id in self.index
+
+    def get(self, parent_id: str) -> Optional[Document]:
+        """Return the parent section as a Document, or None if unknown."""
+        entry = self.index.get(parent_id)
+        if entry is None:
+            return None
+        offset, length, metadata = entry
+        text = bytes(self._data[offset:offset + length]).decode("utf-8")
+        return Document(id=parent_id, page_content=text, metadata=dict(metadata))
+
+    def text_length(self, parent_id: str) -> int:
+        """Return the size of a parent in bytes (0 if unknown), without reading it."""
+        entry = self.index.get(parent_id)
+        return entry[1] if entry else 0
+
+    def close(self) -> None:
+        """Release the mapping."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+def group_parents(texts: Sequence[str], metadatas: Sequence[dict]) -> List[Tuple[str, str, dict]]:
+    """
+    Reassemble parent sections from their child chunks.
+
+    Children are ordered by page and offset and joined with newlines; the
+    structured chunker's children do not overlap, so this restores the
+    section text. Chunks without a ``parent_id`` are skipped.
+
+    Args:
+        texts: Chunk texts
+        metadatas: Chunk metadata
+
+    Returns:
+        (parent_id, text, metadata) tuples; metadata is the first child's,
+        without its ``parent_id``
+    """
+    children: Dict[str, List[Tuple[int, int, str, dict]]] = {}
+    for text, metadata in zip(texts, metadatas):
+        metadata = metadata or {}
+        parent_id = metadata.get("parent_id")
+        if parent_id:
+            children.setdefault(parent_id, []).append(
+                (metadata.get("page", 0), metadata.get("start_index", 0), text, metadata)
+            )
+
+    parents = []
+    for parent_id, members in children.items():
+        members.sort(key=lambda member: member[:2])
+        metadata = {key: value for key, value in members[0][3].items() if key != "parent_id"}
+        parents.append((parent_id, "\n".join(member[2] for member in members), metadata))
+    return parents
+
+
+def parent_store_path_for(persist_directory: str | Path, collection_name: str) -> Path:
+    """Return where a collection's parent store is kept, next to its Chroma directory."""
+    return Path(persist_directory).parent / f"{collection_name}.parents"
+
+
+def load_or_build_parent_store(vector_store: Chroma, path: str | Path, rebuild: bool = False) -> ParentDocStore:
+    """
+    Open the parent store, rebuilding it from the collection's chunks when asked or missing.
+
+    Args:
+        vector_store: Chroma collection holding the child chunks
+        path: Store location (see ``parent_store_path_for``)
+        rebuild: Force a rebuild, e.g. because indexing changed the collection
+
+    Returns:
+        ParentDocStore instance
+    """
+    if rebuild or not ParentDocStore.exists(path):
+        data = vector_store.get(include=["documents", "metadatas"])
+        parents = group_parents(data["documents"], data["metadatas"])
+        ParentDocStore.write(path, parents)
+        print(f"✓ Parent store built: {len(parents)} sections from {len(data['ids'])} chunks")
+    return ParentDocStore(path)
@@ -0,0 +1,175 @@
+"""Speculative retrieval started before the agent asks for it."""
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.rag.retrievers.filters import SectionFilter
+from src.rag.retrievers.service import RetrievalService
+
+
+def speculative_query(history: Sequence[dict], short_words: int = 8, max_chars: int = 500) -> str:
+    """
+    Build the query to prefetch for the newest user message.
+
+    Short follow-ups ("còn mất ngủ thì sao?") say little on their own, so
+    the previous user message is prepended to them.
+
+    Args:
+        history: Chat history as ``{"role", "content"}`` dicts, oldest first
+        short_words: Messages with fewer words than this get the previous
+            user message as context
+        max_chars: Longest query produced
+
+    Returns:
+        Query text ("" if there is no user message)
+    """
+    user_messages = [entry["content"] for entry in history if entry.get("role") == "user" and entry.get("content")]
+    if not user_messages:
+        return ""
+    query = user_messages[-1].strip()
+    if len(query.split()) < short_words and len(user_messages) > 1:
+        query = f"{user_messages[-2].strip()}\n{query}"
+    return query[-max_chars:]
+
+
+def _consume_exception(task: asyncio.Future) -> None:
+    # Failed prefetches are simply not used: mark the error as retrieved so
+    # asyncio does not report it as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+def _cancelled_from_outside(shared: asyncio.Future) -> bool:
+    """
+    Tell who was cancelled after awaiting ``asyncio.shield(shared)`` raised CancelledError.
+
+    Returns True if it is the awaiting task itself (the error must
+    propagate), False if only the shared prefetch was cancelled.
+    """
+    cancelling = getattr(asyncio.current_task(), "cancelling", None)  # Python 3.11+
+    if cancelling is not None:
+        return cancelling() > 0
+    return not shared.cancelled()
+
+
+@dataclass
+class _Prefetch:
+    query: str
+    vector: asyncio.Task
+    docs: asyncio.Task
+
+
+class RetrievalPrefetcher:
+    """
+    Per-conversation cache of speculatively started retrievals.
+
+    ``start`` launches a search for the user's message as soon as it
+    arrives, so it runs while the chat model is still deciding what to do.
+    When the agent then calls ``retrieve_context``, ``match`` compares its
+    query embedding with the prefetched ones and, above ``similarity``,
+    returns the prefetched results (waiting only for what is still in
+    flight) instead of searching again.
+    """
+
+    def __init__(self, retriever: RetrievalService, similarity: float = 0.8, max_entries: int = 4):
+        """
+        Initialize prefetcher.
+
+        Args:
+            retriever: Retrieval service running the searches
+            similarity: Minimum cosine similarity between the agent's query
+                and a prefetched query to reuse its results
+            max_entries: Prefetches kept; the oldest is dropped (and
+                cancelled if still running) when a new one starts
+        """
+        self.retriever = retriever
+        self.similarity = similarity
+        self._entries: Deque[_Prefetch] = deque(maxlen=max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, query: str) -> None:
+        """Start retrieving ``query`` in the background (must be called on the event loop)."""
+        if not query or any(entry.query == query for entry in self._entries):
+            return
+        if len(self._entries) == self._entries.maxlen:
+            self._cancel(self._entries[0])
+        vector = asyncio.ensure_future(self.retriever.aembed_query(query))
+        docs = asyncio.ensure_future(self._search(query, vector))
+        vector.add_done_callback(_consume_exception)
+        docs.add_done_callback(_consume_exception)
+        self._entries.append(_Prefetch(query, vector, docs))
+
+    async def _search(self, query: str, vector: asyncio.Task) -> List[Document]:
+        # Embed once: the search finds the vector in the service's embedding cache
+        await vector
+        return await self.retriever.asearch(query)
+
+    async def match(self, query: str, filter: Optional[SectionFilter] = None) -> Optional[List[Document]]:
+        """
+        Return prefetched results for a query similar to ``query``, or None.
+
+        Args:
+            query: The agent's retrieval query
+            filter: Filtered searches never match (prefetches are unfiltered)
+
+        Returns:
+            Documents of the most similar prefetch above ``similarity``, or
+            None if there is none (or it failed)
+        """
+        if filter is not None or not self._entries:
+            return None
+        vector = np.asarray(await self.retriever.aembed_query(query), dtype=np.float32)
+
+        best, best_similarity = None, self.similarity
+        for entry in list(self._entries):
+            if entry.vector.cancelled():
+                continue
+            try:
+                # Shielded: a cancelled tool call must not cancel the shared prefetch
+                candidate = np.asarray(await asyncio.shield(entry.vector), dtype=np.float32)
+            except asyncio.CancelledError:
+                # The prefetch was cancelled (evicted or closed) while we waited: skip it
+                if _cancelled_from_outside(entry.vector):
+                    raise
+                continue
+            except Exception:
+                continue
+            norms = float(np.linalg.norm(vector) * np.linalg.norm(candidate))
+            similarity = float(vector @ candidate) / norms if norms else 0.0
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best is not None:
+            try:
+                docs = None if best.docs.cancelled() else await asyncio.shield(best.docs)
+            except asyncio.CancelledError:
+                if _cancelled_from_outside(best.docs):
+                    raise
+                docs = None
+            except Exception:
+                docs = None
+            if docs is not None:
+                self.hits += 1
+                return list(docs)
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _cancel(entry: _Prefetch) -> None:
+        entry.docs.cancel()
+        entry.vector.cancel()
+
+    def close(self) -> None:
+        """Cancel prefetches that are still running."""
+        while self._entries:
+            self._cancel(self._entries.popleft())
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters."""
+        pending = sum(not entry.docs.done() for entry in self._entries)
+        return {"hits": self.hits, "misses": self.misses, "pending": pending}
@@ -0,0 +1,220 @@
+"""Cross-encoder re-ranking of retrieved candidates."""
+import json
+import re
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Reranker backends selectable through Settings.rerank_backend
+RERANK_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class CrossEncoderReranker:
+    """
+    Scores (query, passage) pairs with a sentence-transformers cross-encoder on CPU.
+
+    Subclasses only need to implement ``score``.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, max_length: int = 512):
+        """
+        Initialize reranker.
+
+        Args:
+            model_name: Hugging Face cross-encoder, e.g.
+                ``cross-encoder/mmarco-mMiniLMv2-L12-H384-v1``
+            batch_size: Pairs per forward pass
+            max_length: Token limit per pair
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+
+    def score(self, query: str, passages: Sequence[str]) -> np.ndarray:
+        """Return one relevance score per passage (higher is more relevant)."""
+        if not passages:
+            return np.zeros(0, dtype=np.float32)
+        pairs = [(query, passage) for passage in passages]
+        return np.asarray(
+            self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False), dtype=np.float32
+        )
+
+    def rerank(self, query: str, docs: Sequence[Document], k: int) -> List[Document]:
+        """
+        Reorder candidates by cross-encoder score.
+
+        Args:
+            query: Query text
+            docs: First-stage candidates
+            k: Number of results
+
+        Returns:
+            The k highest-scoring Documents, best first
+        """
+        if len(docs) <= 1:
+            return list(docs)[:k]
+        scores = self.score(query, [doc.page_content for doc in docs])
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [docs[i] for i in order]
+
+
+def export_onnx_cross_encoder(model_name: str, output_dir: str | Path, quantize: bool = True) -> Path:
+    """
+    Export a cross-encoder to ONNX, optionally with int8 weights.
+
+    Writes ``model.onnx`` (and ``model_int8.onnx`` when quantizing), the fast
+    tokenizer and a ``config.json``, so inference only needs ``onnxruntime``
+    and ``tokenizers``.
+
+    Args:
+        model_name: Hugging Face cross-encoder name
+        output_dir: Directory to write the export to
+        quantize: Also write a dynamically int8-quantized model
+
+    Returns:
+        The export directory
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+
+    class Logits(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, **inputs):
+            return self.model(**inputs).logits
+
+    sample = tokenizer(["query"], ["passage"], return_tensors="pt")
+    input_names = list(sample.keys())
+    torch.onnx.export(
+        Logits(model),
+        args=(),
+        kwargs=dict(sample),
+        f=str(output_dir / "model.onnx"),
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+        opset_version=14,
+        dynamo=False,
+    )
+    tokenizer.save_pretrained(str(output_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(
+            str(output_dir / "model.onnx"),
+            str(output_dir / "model_int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+
+    config = {
+        "model_name": model_name,
+        "max_length": min(tokenizer.model_max_length, 512),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "num_labels": model.config.num_labels,
+    }
+    with open(output_dir / "config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"✓ Exported {model_name} to ONNX: {output_dir}")
+    return output_dir
+
+
+class OnnxCrossEncoderReranker(CrossEncoderReranker):
+    """Cross-encoder reranker running on ONNX Runtime."""
+
+    def __init__(self, model_dir: str | Path, quantized: bool = False, batch_size: int = 32, threads: int = 0):
+        """
+        Initialize ONNX reranker.
+
+        Args:
+            model_dir: Directory written by ``export_onnx_cross_encoder``
+            quantized: Use the int8 model
+            batch_size: Pairs per inference call
+            threads: ONNX Runtime intra-op threads (0 = runtime default)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.model_name = self.config["model_name"]
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def score(self, query: str, passages: Sequence[str]) -> np.ndarray:
+        """Return one relevance score per passage (higher is more relevant)."""
+        scores = []
+        for start in range(0, len(passages), self.batch_size):
+            encodings = self.tokenizer.encode_batch(
+                [(query, passage) for passage in passages[start:start + self.batch_size]]
+            )
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            # Single-logit models score relevance directly; otherwise use the "relevant" class
+            scores.append(logits[:, 0] if logits.shape[1] == 1 else logits[:, -1])
+        return np.concatenate(scores).astype(np.float32) if scores else np.zeros(0, dtype=np.float32)
+
+
+def create_reranker(
+    model_name: str,
+    backend: str = "torch",
+    onnx_dir: str | Path = ".data/models/onnx",
+    batch_size: int = 32,
+) -> CrossEncoderReranker:
+    """
+    Load a cross-encoder reranker, exporting it to ONNX on first use if needed.
+
+    Args:
+        model_name: Hugging Face cross-encoder name
+        backend: ``torch``, ``onnx`` or ``onnx-int8``
+        onnx_dir: Directory holding ONNX exports
+        batch_size: Pairs per forward pass
+
+    Returns:
+        CrossEncoderReranker instance, warmed up with one dummy pair
+    """
+    if backend not in RERANK_BACKENDS:
+        raise ValueError(f"Unknown rerank backend {backend!r}; expected one of {RERANK_BACKENDS}")
+    if backend == "torch":
+        reranker = CrossEncoderReranker(model_name, batch_size=batch_size)
+    else:
+        quantized = backend == "onnx-int8"
+        model_dir = Path(onnx_dir) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+        if not (model_dir / "config.json").exists() or (quantized and not (model_dir / "model_int8.onnx").exists()):
+            export_onnx_cross_encoder(model_name, model_dir, quantize=True)
+        reranker = OnnxCrossEncoderReranker(model_dir, quantized=quantized, batch_size=batch_size)
+    # The first forward pass pays for lazy initialization: take it here, not on a user's search
+    started = time.perf_counter()
+    reranker.score("warm-up", ["warm-up"])
+    print(f"✓ Reranker initialized: {model_name} ({backend}, warm-up {time.perf_counter() - started:.2f}s)")
+    return reranker
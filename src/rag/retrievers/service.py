@@ -0,0 +1,440 @@
+"""Retrieval service shared by the agent tools."""
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.rag.embeddings.batching import QueryEmbeddingBatcher, embed_query_batch
+from src.rag.embeddings.registry import EmbeddingModelSpec, check_vector_dimension
+from src.rag.normalize import normalize_text
+from src.rag.retrievers.bm25 import BM25Index
+from src.rag.retrievers.executor import RetrievalExecutor
+from src.rag.retrievers.filters import SectionFilter, SectionIndex
+from src.rag.retrievers.flat_index import FlatVectorIndex
+from src.rag.retrievers.mmr import maximal_marginal_relevance
+from src.rag.retrievers.parents import ParentDocStore
+from src.rag.retrievers.hybrid import document_key, reciprocal_rank_fusion
+from src.rag.retrievers.query_cache import LRUCache, normalize_query
+from src.rag.retrievers.reranker import CrossEncoderReranker
+
+
+class RetrievalService:
+    """
+    Vector search over the knowledge base with in-process query caches.
+
+    Two LRU caches sit in front of the vector store: normalized query text
+    to query embedding (skipping model inference) and normalized query text
+    plus ``k`` and filter to the top-k Documents (skipping the search as well).
+    ``asearch`` answers cache hits on the event loop and runs everything else
+    on a bounded ``RetrievalExecutor``; its query embeddings go through a
+    ``QueryEmbeddingBatcher`` so concurrent sessions share forward passes.
+
+    With a ``sparse_index`` the service does hybrid retrieval: dense and BM25
+    candidates are fetched in parallel and merged by reciprocal-rank fusion,
+    so exact matches on criterion codes and Vietnamese symptom terms are not
+    lost to the English-centric embedder.
+
+    With a ``dense_index`` the vector side is an exact NumPy search over a
+    memory-mapped mirror of the collection.
+
+    Searches can be restricted to chapters or disorder codes with a
+    ``SectionFilter`` (see ``resolve_filter``); the filter narrows the
+    candidate rows before any scoring.
+
+    With a ``reranker`` the service over-fetches ``rerank_candidates`` and
+    lets a cross-encoder pick the final ``k``. Reranking is skipped (keeping
+    the first-stage order) when the first stage plus the expected reranking
+    time would exceed ``rerank_budget``; every ``rerank_probe_every`` skips one
+search is reranked anyway to refresh that estimate.
+
+    With ``mmr_lambda`` set the final ``k`` are picked by maximal marginal
+    relevance from ``mmr_candidates``, so overlapping neighbouring chunks do
+    not fill the context twice. Relevance is cosine similarity to the query,
+    or the cross-encoder score when reranking ran.
+
+    With a ``parent_store`` retrieval is small-to-big: the small chunks are
+    scored, and each hit is replaced by its parent section (deduplicated),
+    unless the parent is larger than ``parent_max_bytes``.
+    """
+
+    def __init__(
+        self,
+        vector_store: Chroma,
+        k: int = 2,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = None,
+        executor: Optional[RetrievalExecutor] = None,
+        batch_window: float = 0.005,
+        max_batch: int = 32,
+        model_spec: Optional[EmbeddingModelSpec] = None,
+        sparse_index: Optional[BM25Index] = None,
+        hybrid_candidates: int = 20,
+        rrf_k: int = 60,
+        dense_index: Optional[FlatVectorIndex] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rerank_candidates: int = 20,
+        rerank_budget: Optional[float] = None,
+        rerank_probe_every: int = 20,
+        section_index: Optional[SectionIndex] = None,
+        parent_store: Optional[ParentDocStore] = None,
+        parent_max_bytes: int = 6000,
+        mmr_lambda: Optional[float] = None,
+        mmr_candidates: int = 20,
+    ):
+        """
+        Initialize retrieval service.
+
+        Args:
+            vector_store: Chroma vector store to search
+            k: Default number of results
+            cache_size: Maximum entries per cache (0 disables caching)
+            cache_ttl: Seconds a cached entry stays valid, or None for no expiry
+            executor: Pool running searches for ``asearch`` (a default one
+                is created if omitted)
+            batch_window: Seconds ``asearch`` waits to coalesce concurrent
+                query embeddings (0 disables batching)
+            max_batch: Maximum queries per embedding batch
+            model_spec: Embedding model the collection was built with; query
+                vectors of another dimension are refused
+            sparse_index: BM25 index enabling hybrid retrieval
+            hybrid_candidates: Candidates fetched from each side before fusion
+            rrf_k: Reciprocal-rank fusion constant
+            dense_index: Flat in-memory mirror of the collection used
+                instead of Chroma for vector search
+            reranker: Cross-encoder applied to the first-stage candidates
+            rerank_candidates: Candidates passed to the reranker
+            rerank_budget: Seconds a search may take before reranking is
+                skipped, or None for no limit
+            rerank_probe_every: After this many consecutive skipped
+                searches, rerank one anyway to re-measure its cost, so one
+                slow pass does not disable reranking for good
+            section_index: Chapter/section/disorder-code index used by
+                ``resolve_filter``
+            parent_store: Parent sections returned in place of matching chunks
+            parent_max_bytes: Largest parent (UTF-8 bytes) returned whole;
+                hits in larger parents are returned as the chunk itself
+            mmr_lambda: Relevance/diversity trade-off of MMR selection (1 =
+                relevance only), or None to keep the ranked order
+            mmr_candidates: Candidates MMR selects from
+        """
+        self.vector_store = vector_store
+        self.embeddings = vector_store.embeddings
+        self.k = k
+        self.model_spec = model_spec
+        self.sparse_index = sparse_index
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.dense_index = dense_index
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.rerank_budget = rerank_budget
+        self.rerank_probe_every = rerank_probe_every
+        self.section_index = section_index
+        self.parent_store = parent_store
+        self.parent_max_bytes = parent_max_bytes
+        self.mmr_lambda = mmr_lambda
+        self.mmr_candidates = mmr_candidates
+        self._mmr_seconds = 0.0  # moving average of one MMR selection
+        self._mmr_count = 0
+        self._rerank_seconds = 0.0  # moving average of one reranking pass
+        self._rerank_counts = {"reranked": 0, "skipped": 0}
+        self._rerank_skipped_in_row = 0
+        self.embedding_cache = LRUCache(cache_size, cache_ttl)
+        self.result_cache = LRUCache(cache_size, cache_ttl)
+        self.executor = executor or RetrievalExecutor()
+        self.batcher = None
+        if batch_window > 0:
+            self.batcher = QueryEmbeddingBatcher(self.embeddings, self.executor.run, batch_window, max_batch)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Return the embedding for a query, from cache when possible.
+
+        The cache is keyed by ``normalize_query`` (lowercased, whitespace
+        collapsed), but the model sees the query with its casing intact,
+        only NFC/tone-mark normalized like the indexed chunks.
+        """
+        key = normalize_query(query)
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalize_text(query))
+            self._check_dimension(vector)
+            self.embedding_cache.set(key, vector)
+        return vector
+
+    def resolve_filter(
+        self, chapter: Optional[str] = None, disorder_code: Optional[str] = None
+    ) -> Optional[SectionFilter]:
+        """
+        Build a filter from a chapter name and/or disorder code.
+
+        Raises:
+            ValueError: If filtering is unavailable or nothing matches
+        """
+        if not chapter and not disorder_code:
+            return None
+        if self.section_index is None or not len(self.section_index):
+            raise ValueError("The knowledge base has no chapter/section metadata to filter on")
+        return self.section_index.resolve(chapter, disorder_code)
+
+    def search(
+        self, query: str, k: Optional[int] = None, filter: Optional[SectionFilter] = None
+    ) -> List[Document]:
+        """
+        Return the top-k Documents for a query.
+
+        Args:
+            query: Query text
+            k: Number of results (defaults to the service's ``k``)
+            filter: Restrict results to some chapters/sections
+
+        Returns:
+            List of Documents, most similar first
+        """
+        k = k or self.k
+        key = (normalize_query(query), k, filter)
+        docs = self.result_cache.get(key)
+        if docs is None:
+            started = time.perf_counter()
+            vector = self.embed_query(query)
+            n = self._candidate_count(k)
+            if self.sparse_index is None:
+                candidates = self._dense_search(vector, n, filter)
+            else:
+                candidates = self._fuse(
+                    self._dense_search(vector, n, filter), self._sparse_search(query, n, filter)
+                )
+            docs = self._expand_parents(self._select(query, vector, candidates, k, started))
+            self.result_cache.set(key, docs)
+        return list(docs)
+
+    async def asearch(
+        self, query: str, k: Optional[int] = None, filter: Optional[SectionFilter] = None
+    ) -> List[Document]:
+        """
+        Async variant of ``search`` that never blocks the event loop.
+
+        Args:
+            query: Query text
+            k: Number of results (defaults to the service's ``k``)
+            filter: Restrict results to some chapters/sections
+
+        Returns:
+            List of Documents, most similar first
+        """
+        k = k or self.k
+        key = (normalize_query(query), k, filter)
+        docs = self.result_cache.get(key)
+        if docs is None:
+            started = time.perf_counter()
+            vector = await self.aembed_query(query)
+            n = self._candidate_count(k)
+            if self.sparse_index is None:
+                candidates = await self.executor.run(self._dense_search, vector, n, filter)
+            else:
+                # The sparse side is sub-millisecond: run it here while the dense search is in flight
+                dense = asyncio.ensure_future(self.executor.run(self._dense_search, vector, n, filter))
+                try:
+                    sparse = self._sparse_search(query, n, filter)
+                except BaseException:
+                    dense.cancel()
+                    raise
+                candidates = self._fuse(await dense, sparse)
+            if self.reranker is None and self.mmr_lambda is None:
+                docs = candidates[:k]
+            else:
+                docs = await self.executor.run(self._select, query, vector, candidates, k, started)
+            docs = self._expand_parents(docs)
+            self.result_cache.set(key, docs)
+        return list(docs)
+
+    async def asearch_many(
+        self, queries: List[str], k: Optional[int] = None, filter: Optional[SectionFilter] = None
+    ) -> List[Document]:
+        """
+        Search several related queries at once and merge the results.
+
+        The uncached query embeddings are computed in one batch, the searches
+        then run concurrently, and the per-query rankings are merged by
+        reciprocal-rank fusion, which also drops duplicates.
+
+        Args:
+            queries: Query texts (duplicates after normalization are searched once)
+            k: Results per query (defaults to the service's ``k``)
+            filter: Restrict results to some chapters/sections
+
+        Returns:
+            Deduplicated Documents, those ranked highly by most queries first
+        """
+        unique: Dict[str, str] = {}
+        for query in queries:
+            if query.strip():
+                unique.setdefault(normalize_query(query), query)
+        queries = list(unique.values())
+        if not queries:
+            return []
+        await self.aembed_queries(queries)
+        rankings = await asyncio.gather(*(self.asearch(query, k, filter) for query in queries))
+        return reciprocal_rank_fusion(rankings, k=self.rrf_k)
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding the uncached ones in a single batch."""
+        keys = [normalize_query(query) for query in queries]
+        vectors = {key: self.embedding_cache.get(key) for key in keys}
+        # First spelling of each uncached key is the one embedded
+        missing: Dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            if vectors[key] is None:
+                missing.setdefault(key, normalize_text(query))
+        if missing:
+            texts = list(missing.values())
+            for key, vector in zip(missing, await self.executor.run(embed_query_batch, self.embeddings, texts)):
+                self._check_dimension(vector)
+                self.embedding_cache.set(key, vector)
+                vectors[key] = vector
+        return [vectors[key] for key in keys]
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Async ``embed_query``, batched with concurrent callers."""
+        key = normalize_query(query)
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            text = normalize_text(query)
+            if self.batcher is not None:
+                vector = await self.batcher.aembed(text)
+            else:
+                vector = await self.executor.run(self.embeddings.embed_query, text)
+            self._check_dimension(vector)
+            self.embedding_cache.set(key, vector)
+        return vector
+
+    def _dense_search(self, vector: List[float], k: int, filter: Optional[SectionFilter] = None) -> List[Document]:
+        if self.dense_index is not None:
+            return self.dense_index.similarity_search_by_vector(vector, k=k, filter=filter)
+        where = filter.to_where() if filter is not None else None
+        return self.vector_store.similarity_search_by_vector(vector, k=k, filter=where)
+
+    def _sparse_search(self, query: str, k: int, filter: Optional[SectionFilter] = None) -> List[Document]:
+        hits = self.sparse_index.search(query, k, filter)
+        return self.sparse_index.documents([row for row, _ in hits])
+
+    def _fuse(self, dense: List[Document], sparse: List[Document]) -> List[Document]:
+        return reciprocal_rank_fusion([dense, sparse], k=self.rrf_k)
+
+    def _candidate_count(self, k: int) -> int:
+        """Return how many candidates each first-stage retriever should fetch."""
+        n = k
+        if self.sparse_index is not None:
+            n = max(n, self.hybrid_candidates)
+        if self.reranker is not None:
+            n = max(n, self.rerank_candidates)
+        if self.mmr_lambda is not None:
+            n = max(n, self.mmr_candidates)
+        return n
+
+    def _select(
+        self, query: str, vector: List[float], candidates: List[Document], k: int, started: float
+    ) -> List[Document]:
+        """Pick the final k candidates, reranking them if the latency budget allows and diversifying them with MMR."""
+        if len(candidates) <= 1 or (self.reranker is None and self.mmr_lambda is None):
+            return candidates[:k]
+
+        scores = None
+        if self.reranker is not None:
+            elapsed = time.perf_counter() - started
+            over_budget = self.rerank_budget is not None and elapsed + self._rerank_seconds > self.rerank_budget
+            # The estimate only changes when reranking runs: probe now and then so it can recover
+            probe = over_budget and self._rerank_skipped_in_row >= self.rerank_probe_every
+            if over_budget and not probe:
+                self._rerank_counts["skipped"] += 1
+                self._rerank_skipped_in_row += 1
+            else:
+                rerank_started = time.perf_counter()
+                pool = candidates[:self.rerank_candidates]
+                scores = self.reranker.score(query, [doc.page_content for doc in pool])
+                order = np.argsort(-scores, kind="stable")
+                candidates, scores = [pool[i] for i in order], scores[order]
+                seconds = time.perf_counter() - rerank_started
+                # Prime the average with the first pass (or a probe: the old estimate is stale), then smooth
+                self._rerank_seconds = seconds if probe or not self._rerank_counts["reranked"] else (
+                    0.8 * self._rerank_seconds + 0.2 * seconds
+                )
+                self._rerank_counts["reranked"] += 1
+                self._rerank_skipped_in_row = 0
+
+        if self.mmr_lambda is None:
+            return candidates[:k]
+        return self._diversify(vector, candidates[:self.mmr_candidates], k, scores)
+
+    def _diversify(
+        self, vector: List[float], candidates: List[Document], k: int, scores: Optional[np.ndarray] = None
+    ) -> List[Document]:
+        """Select k of the candidates by maximal marginal relevance (ranked order if their vectors are unavailable)."""
+        matrix = self._candidate_vectors(candidates)
+        if matrix is None:
+            return candidates[:k]
+        relevance = None
+        if scores is not None:
+            scores = scores[:len(candidates)]
+            # Cross-encoder logits are unbounded: scale them to cosine's range
+            spread = float(scores.max() - scores.min())
+            relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+        mmr_started = time.perf_counter()
+        selected = maximal_marginal_relevance(vector, matrix, k, self.mmr_lambda, relevance)
+        seconds = time.perf_counter() - mmr_started
+        self._mmr_seconds = seconds if not self._mmr_count else 0.8 * self._mmr_seconds + 0.2 * seconds
+        self._mmr_count += 1
+        return [candidates[i] for i in selected]
+
+    def _candidate_vectors(self, candidates: List[Document]) -> Optional[np.ndarray]:
+        """Return the stored embeddings of the candidates, from the flat index or Chroma."""
+        ids = [document_key(doc) for doc in candidates]
+        if self.dense_index is not None:
+            return self.dense_index.vectors(ids)
+        data = self.vector_store.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(data["ids"], data["embeddings"]))
+        if any(chunk_id not in by_id for chunk_id in ids):
+            return None
+        return np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+
+    def _expand_parents(self, docs: List[Document]) -> List[Document]:
+        """Replace chunks by their parent sections, keeping each parent once, in rank order."""
+        if self.parent_store is None:
+            return docs
+        expanded, seen = [], set()
+        for doc in docs:
+            parent_id = doc.metadata.get("parent_id")
+            if parent_id and 0 < self.parent_store.text_length(parent_id) <= self.parent_max_bytes:
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    expanded.append(self.parent_store.get(parent_id))
+            else:
+                expanded.append(doc)
+        return expanded
+
+    def _check_dimension(self, vector: List[float]) -> None:
+        if self.model_spec is not None:
+            check_vector_dimension(vector, self.model_spec)
+
+    def invalidate(self) -> None:
+        """Drop cached results, e.g. after the index changed."""
+        self.result_cache.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return cache counters, executor queue depth, batching, reranking and MMR statistics."""
+        stats = {
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.result_cache.stats(),
+            "executor": self.executor.stats(),
+        }
+        if self.batcher is not None:
+            stats["batching"] = self.batcher.stats()
+        if self.reranker is not None:
+            stats["reranking"] = {**self._rerank_counts, "avg_ms": self._rerank_seconds * 1000}
+        if self.mmr_lambda is not None:
+            stats["mmr"] = {"selections": self._mmr_count, "avg_ms": self._mmr_seconds * 1000}
+        return stats
@@ -0,0 +1,40 @@
+"""File helpers shared by the indexes persisted next to the vector store."""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+
+def with_ext(path: Path, ext: str) -> Path:
+    """Append ``ext`` to a path's name ("bm25" -> "bm25.json"), keeping any dots already in it."""
+    return path.with_name(path.name + ext)
+
+
+@contextmanager
+def atomic_files(*paths: Path) -> Iterator[List[Path]]:
+    """
+    Replace one or more files only once all of them have been written.
+
+    Yields a temporary path per target (``<path>.tmp``, in the same
+    directory). When the block completes they are moved over the targets
+    with ``os.replace``, in order, so the last path is the commit point:
+    a reader that sees it also sees the files before it. Readers that
+    already opened or memory-mapped an old file keep its contents. If the
+    block raises, the temporary files are removed and the targets are left
+    untouched.
+
+    Args:
+        paths: Files to replace
+
+    Yields:
+        Temporary paths to write, one per target
+    """
+    tmp_paths = [with_ext(Path(path), ".tmp") for path in paths]
+    try:
+        yield tmp_paths
+    except BaseException:
+        for tmp_path in tmp_paths:
+            tmp_path.unlink(missing_ok=True)
+        raise
+    for tmp_path, path in zip(tmp_paths, paths):
+        os.replace(tmp_path, path)
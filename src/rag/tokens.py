@@ -0,0 +1,57 @@
+"""Token counting shared by chunking and context assembly."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding or a Hugging Face tokenizer.
+
+    Names containing a ``/`` (e.g. ``sentence-transformers/all-MiniLM-L6-v2``)
+    load that model's fast tokenizer; anything else is a tiktoken encoding
+    such as ``o200k_base``. If neither can be loaded (e.g. offline with
+    nothing cached) it falls back to an estimate of 4 characters per token.
+    """
+
+    def __init__(self, name: str = "o200k_base"):
+        """
+        Initialize token counter.
+
+        Args:
+            name: tiktoken encoding or Hugging Face model name
+        """
+        self.name = name
+        self._tiktoken = None
+        self._tokenizer = None
+        try:
+            if "/" in name:
+                from tokenizers import Tokenizer
+                self._tokenizer = Tokenizer.from_pretrained(name)
+                self._tokenizer.no_truncation()
+            else:
+                import tiktoken
+                self._tiktoken = tiktoken.get_encoding(name)
+        except Exception as e:
+            logger.warning(f"Tokenizer {name!r} unavailable ({e}); estimating 4 characters per token")
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        if self._tiktoken is not None:
+            return len(self._tiktoken.encode_ordinary(text))
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+        return (len(text) + 3) // 4
+
+    def head(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of ``text`` with at most ``max_tokens`` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self._tiktoken is not None:
+            # Dropping a trailing partial UTF-8 sequence keeps this an exact prefix of ``text``
+            head = self._tiktoken.decode_bytes(self._tiktoken.encode_ordinary(text)[:max_tokens])
+            return head.decode("utf-8", errors="ignore")
+        if self._tokenizer is not None:
+            offsets = self._tokenizer.encode(text, add_special_tokens=False).offsets
+            return text if len(offsets) <= max_tokens else text[:offsets[max_tokens - 1][1]]
+        return text[:max_tokens * 4]
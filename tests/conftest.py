@@ -0,0 +1,7 @@
+"""Shared pytest setup: make ``src`` and ``config`` importable from the project root."""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
@@ -0,0 +1,41 @@
+"""Relevance criteria of the retrieval benchmark."""
+from langchain_core.documents import Document
+
+from src.rag.evaluation.benchmark import DEFAULT_QUERIES, is_relevant, load_queries
+
+INSOMNIA = {
+    "section": ["Insomnia Disorder", "Rối loạn mất ngủ"],
+    "heading": ["Diagnostic Criteria", "Tiêu chuẩn chẩn đoán"],
+    "all_of": [["at least 3 nights per week", "ít nhất 3 đêm mỗi tuần"], ["at least 3 months", "ít nhất 3 tháng"]],
+}
+
+
+def doc(text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_chunk_under_the_named_subsection_is_relevant():
+    chunk = doc("A. Than phiền chủ yếu là không hài lòng...", section="Rối loạn mất ngủ", heading="Tiêu chuẩn chẩn đoán:")
+
+    assert is_relevant(chunk, INSOMNIA)
+
+
+def test_other_subsections_and_generic_mentions_are_not():
+    prevalence = doc("Khoảng một phần ba người lớn than phiền mất ngủ.", section="Rối loạn mất ngủ", heading="Tỷ lệ hiện mắc")
+    other = doc("Mất ngủ là triệu chứng thường gặp của trầm cảm.", section="Rối loạn trầm cảm chủ yếu", chapter="Sleep-Wake Disorders")
+
+    assert not is_relevant(prevalence, INSOMNIA)
+    assert not is_relevant(other, INSOMNIA)
+
+
+def test_chunk_with_every_phrase_group_is_relevant_without_metadata():
+    chunk = doc("C. Khó ngủ xảy ra ít nhất 3 đêm mỗi tuần.\nD. Khó ngủ kéo dài ít nhất 3 tháng.")
+
+    assert is_relevant(chunk, INSOMNIA)
+    assert not is_relevant(doc("Khó ngủ kéo dài ít nhất 3 tháng."), INSOMNIA)
+
+
+def test_bundled_queries_use_specific_criteria():
+    for item in load_queries(DEFAULT_QUERIES):
+        assert set(item["relevant"]) <= {"section", "heading", "all_of"}
+        assert item["relevant"]["heading"] and len(item["relevant"]["all_of"]) >= 2
@@ -0,0 +1,85 @@
+"""Disorder cards built from the structured chunker's output."""
+from langchain_core.documents import Document
+
+from src.rag.loaders.chunking import StructuredChunker
+from src.rag.retrievers.cards import AliasTrie, DisorderCards
+
+INSOMNIA_PAGE = """RỐI LOẠN MẤT NGỦ
+Tiêu chuẩn chẩn đoán
+A. Than phiền chủ yếu là không hài lòng về số lượng hoặc chất lượng giấc ngủ.
+1. Khó đi vào giấc ngủ.
+2. Khó duy trì giấc ngủ.
+B. Rối loạn giấc ngủ gây đau khổ hoặc suy giảm đáng kể về lâm sàng.
+C. Khó ngủ xảy ra ít nhất 3 đêm mỗi tuần.
+D. Khó ngủ kéo dài ít nhất 3 tháng.
+Ghi mã: F51.01
+Tỷ lệ hiện mắc
+Khoảng một phần ba người lớn có triệu chứng mất ngủ.
+"""
+
+ALIASES = [
+    {"codes": ["F51.01"], "names": ["Insomnia Disorder", "rối loạn mất ngủ", "mất ngủ"]},
+    {"codes": ["F41.1"], "names": ["Generalized Anxiety Disorder", "rối loạn lo âu lan tỏa"]},
+]
+
+
+def chunks_of(text: str, section: str):
+    page = Document(
+        page_content=text,
+        metadata={
+            "source": "dsm5-vi.pdf", "page": 361, "section_id": "giac-ngu/mat-ngu",
+            "section": section, "chapter": "Rối loạn giấc ngủ - thức",
+        },
+    )
+    docs = list(StructuredChunker(max_tokens=256, min_tokens=0).split_pages([page]))
+    return [doc.page_content for doc in docs], [doc.metadata for doc in docs]
+
+
+def test_card_is_built_from_a_vietnamese_criteria_section():
+    cards = DisorderCards.build(*chunks_of(INSOMNIA_PAGE, "Rối loạn mất ngủ"), aliases=ALIASES)
+
+    card = cards.lookup("F51.01")
+    assert len(cards) == 1 and card.name == "Rối loạn mất ngủ"
+    assert [criterion[:2] for criterion in card.criteria] == ["A.", "B.", "C.", "D."]
+    assert card.codes == ["F51.01"] and card.page == "362"
+    # The Vietnamese outline name picks up the English name and other aliases
+    assert card.aliases == ["Insomnia Disorder", "mất ngủ"]
+    assert cards.lookup("insomnia disorder") is card and cards.lookup("F51") is card
+
+
+def test_aliases_fall_back_to_the_disorder_code():
+    cards = DisorderCards.build(*chunks_of(INSOMNIA_PAGE, "Chứng mất ngủ nguyên phát"), aliases=ALIASES)
+
+    assert cards.lookup("Insomnia Disorder").name == "Chứng mất ngủ nguyên phát"
+
+
+def test_sections_without_criteria_give_no_cards():
+    text = INSOMNIA_PAGE.replace("Tiêu chuẩn chẩn đoán", "Đặc điểm chẩn đoán")
+
+    assert len(DisorderCards.build(*chunks_of(text, "Rối loạn mất ngủ"), aliases=ALIASES)) == 0
+
+
+def test_cards_round_trip(tmp_path):
+    cards = DisorderCards.build(*chunks_of(INSOMNIA_PAGE, "Rối loạn mất ngủ"), aliases=ALIASES)
+    cards.save(tmp_path / "kb.cards.json")
+
+    loaded = DisorderCards.load(tmp_path / "kb.cards.json")
+
+    assert loaded.lookup("mất ngủ").render() == cards.lookup("mất ngủ").render()
+
+
+def test_alias_trie_completes_prefixes_and_finds_mentions():
+    trie = AliasTrie()
+    trie.insert("rối loạn lo âu lan toả", "gad")
+    trie.insert("rối loạn lo âu xã hội", "social")
+    trie.insert("lo âu", "gad")
+
+    assert sorted(trie.complete("rối loạn lo")) == ["gad", "social"]
+    assert trie.complete("rối loạn lo âu x") == ["social"]
+    assert trie.complete("trầm") == []
+    text = "tôi nghĩ mình bị rối loạn lo âu xã hội"
+    assert [(text[start:end], ids) for start, end, ids in trie.mentions(text)] == [
+        ("rối loạn lo âu xã hội", ["social"]), ("lo âu", ["gad"]),
+    ]
+    # Only whole words match
+    assert list(trie.mentions("lo âux")) == []
@@ -0,0 +1,83 @@
+"""Structure-aware chunking of DSM-5 pages."""
+from langchain_core.documents import Document
+
+from src.rag.loaders.chunking import StructuredChunker
+from src.rag.loaders.outline import slugify
+
+VIETNAMESE_PAGE = """RỐI LOẠN TRẦM CẢM CHỦ YẾU
+Tiêu chuẩn chẩn đoán
+A. Có ít nhất năm triệu chứng sau đây trong cùng một giai đoạn hai tuần.
+1. Khí sắc trầm cảm gần như cả ngày, gần như mỗi ngày.
+2. Giảm rõ rệt hứng thú hoặc niềm vui trong mọi hoạt động.
+B. Các triệu chứng gây ra sự đau khổ hoặc suy giảm đáng kể về lâm sàng.
+Tỷ lệ hiện mắc
+Tỷ lệ hiện mắc 12 tháng của rối loạn trầm cảm chủ yếu ở Hoa Kỳ vào khoảng 7%.
+Chẩn đoán phân biệt
+Các giai đoạn hưng cảm có khí sắc kích thích hoặc giai đoạn hỗn hợp.
+"""
+
+
+def chunk(text: str):
+    page = Document(page_content=text, metadata={"source": "dsm5-vi.pdf", "page": 0, "section_id": "tram-cam/mdd"})
+    return list(StructuredChunker(max_tokens=256, min_tokens=0).split_pages([page]))
+
+
+def test_vietnamese_headings_start_subsections():
+    chunks = chunk(VIETNAMESE_PAGE)
+
+    assert [doc.metadata["heading"] for doc in chunks] == [
+        "Tiêu chuẩn chẩn đoán", "Tỷ lệ hiện mắc", "Chẩn đoán phân biệt",
+    ]
+    assert [doc.metadata["parent_id"] for doc in chunks] == [
+        "tram-cam/mdd#tieu-chuan-chan-doan", "tram-cam/mdd#ty-le-hien-mac", "tram-cam/mdd#chan-doan-phan-biet",
+    ]
+    # The criterion and its numbered symptoms stay in one chunk
+    assert "Tiêu chuẩn chẩn đoán\nA. Có ít nhất" in chunks[0].page_content
+    assert "B. Các triệu chứng" in chunks[0].page_content
+
+
+def test_heading_match_ignores_tone_mark_style_and_case():
+    # Old-style tone placement ("hóa") and upper case still match "văn hoá"
+    chunks = chunk("CÁC VẤN ĐỀ CHẨN ĐOÁN LIÊN QUAN ĐẾN VĂN HÓA\nTriệu chứng có thể được mô tả khác nhau.\n")
+
+    assert chunks[0].metadata["heading"] == "CÁC VẤN ĐỀ CHẨN ĐOÁN LIÊN QUAN ĐẾN VĂN HÓA"
+
+
+def test_sentence_case_vietnamese_text_is_not_a_heading():
+    chunks = chunk("Tiêu chuẩn chẩn đoán\nBệnh nhân thường than phiền\nvề giấc ngủ kém.\n")
+
+    assert len(chunks) == 1 and chunks[0].metadata["heading"] == "Tiêu chuẩn chẩn đoán"
+
+
+def test_slug_keeps_d_with_stroke():
+    assert slugify("Rối loạn đau đớn") == "roi-loan-dau-don"
+
+
+def test_repeated_criteria_heading_in_one_group_starts_a_new_subsection():
+    # No outline: both pages fall in one group of _PAGES_PER_GROUP pages
+    pages = [
+        Document(page_content=text, metadata={"source": "dsm5-vi.pdf", "page": number})
+        for number, text in enumerate([
+            "RỐI LOẠN TRẦM CẢM CHỦ YẾU\n"
+            "Tiêu chuẩn chẩn đoán\n"
+            "A. Có ít nhất năm triệu chứng sau đây trong cùng một giai đoạn hai tuần.\n"
+            "\n"
+            "RỐI LOẠN TRẦM CẢM DAI DẲNG\n"
+            "Tiêu chuẩn chẩn đoán\n"
+            "A. Khí sắc trầm cảm kéo dài ít nhất 2 năm.\n",
+            # Running header repeating the disorder name, then the rest of the criteria
+            "RỐI LOẠN TRẦM CẢM DAI DẲNG\n"
+            "B. Có từ hai triệu chứng sau trở lên khi bị trầm cảm.\n"
+            "42\n",
+        ])
+    ]
+
+    chunks = list(StructuredChunker(max_tokens=256, min_tokens=0).split_pages(pages))
+
+    assert [(doc.metadata["parent_id"], doc.metadata["heading"]) for doc in chunks] == [
+        ("dsm5-vi#tieu-chuan-chan-doan", "Tiêu chuẩn chẩn đoán"),
+        ("dsm5-vi#tieu-chuan-chan-doan-2", "Tiêu chuẩn chẩn đoán"),
+    ]
+    assert "hai tuần" in chunks[0].page_content and "2 năm" not in chunks[0].page_content
+    assert "2 năm" in chunks[1].page_content and "B. Có từ hai" in chunks[1].page_content
+    assert chunks[1].page_content.count("RỐI LOẠN TRẦM CẢM DAI DẲNG") == 1
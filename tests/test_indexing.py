@@ -0,0 +1,198 @@
+"""Incremental sync of source files with the vector store."""
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from langchain_core.documents import Document
+
+from src.rag.indexing.indexer import sync_documents
+from src.rag.indexing.manifest import IndexManifest, chunk_ids_for
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows: Dict[str, str] = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.rows.update(zip(ids, documents))
+
+
+class FakeVectorStore:
+    """The parts of ``Chroma`` that indexing uses."""
+
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+        self._collection = FakeCollection()
+
+    def get(self, include=None):
+        return {"ids": list(self._collection.rows)}
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self._collection.rows.pop(chunk_id, None)
+
+    def texts(self) -> List[str]:
+        return sorted(self._collection.rows.values())
+
+
+class LineLoader:
+    """One chunk per line; records which files were parsed."""
+
+    def __init__(self):
+        self.loaded: List[str] = []
+
+    def __call__(self, paths: List[Path]):
+        for path in paths:
+            self.loaded.append(path.name)
+            lines = [line for line in path.read_text(encoding="utf-8").splitlines() if line]
+            yield path, [Document(page_content=line, metadata={"source": path.name}) for line in lines], False
+            yield path, [], True
+
+
+@pytest.fixture
+def store():
+    return FakeVectorStore()
+
+
+def sync(store, tmp_path, paths, pipeline="v1"):
+    loader = LineLoader()
+    manifest = IndexManifest(tmp_path / "index.manifest.json", pipeline=pipeline)
+    stats = sync_documents(store, paths, manifest, loader, batch_size=2)
+    return stats, loader
+
+
+def write(path: Path, *lines: str) -> Path:
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_first_sync_indexes_every_chunk(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ", "lo âu", "trầm cảm")
+    b = write(tmp_path / "b.txt", "hoảng sợ")
+
+    stats, loader = sync(store, tmp_path, [a, b])
+
+    assert stats.chunks_added == 4 and stats.files_changed == 2 and stats.changed
+    assert store.texts() == sorted(["mất ngủ", "lo âu", "trầm cảm", "hoảng sợ"])
+    assert sorted(loader.loaded) == ["a.txt", "b.txt"]
+
+
+def test_unchanged_files_are_not_parsed(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ", "lo âu")
+    sync(store, tmp_path, [a])
+
+    stats, loader = sync(store, tmp_path, [a])
+
+    assert loader.loaded == []
+    assert stats.chunks_unchanged == 2 and not stats.changed
+
+
+def test_modified_file_embeds_new_chunks_and_deletes_stale_ones(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ", "lo âu", "trầm cảm")
+    sync(store, tmp_path, [a])
+
+    write(a, "mất ngủ", "trầm cảm", "hoảng sợ")
+    stats, loader = sync(store, tmp_path, [a])
+
+    assert loader.loaded == ["a.txt"]
+    assert stats.chunks_added == 1 and stats.chunks_deleted == 1 and stats.chunks_unchanged == 2
+    assert store.texts() == sorted(["mất ngủ", "trầm cảm", "hoảng sợ"])
+    manifest = IndexManifest.load(tmp_path / "index.manifest.json")
+    assert manifest.all_chunk_ids() == set(store._collection.rows)
+
+
+def test_deleted_file_removes_its_chunks(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ")
+    b = write(tmp_path / "b.txt", "lo âu", "hoảng sợ")
+    sync(store, tmp_path, [a, b])
+
+    b.unlink()
+    stats, _ = sync(store, tmp_path, [a])
+
+    assert stats.files_removed == 1 and stats.chunks_deleted == 2
+    assert store.texts() == ["mất ngủ"]
+    assert list(IndexManifest.load(tmp_path / "index.manifest.json").files) == [a.as_posix()]
+
+
+def test_pipeline_change_reparses_every_file(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ")
+    sync(store, tmp_path, [a], pipeline="v1")
+
+    _, loader = sync(store, tmp_path, [a], pipeline="v2")
+
+    assert loader.loaded == ["a.txt"]
+
+
+def test_untracked_vectors_are_removed_without_a_manifest(store, tmp_path):
+    store._collection.rows["stray"] = "left over from an older pipeline"
+    a = write(tmp_path / "a.txt", "mất ngủ")
+
+    stats, _ = sync(store, tmp_path, [a])
+
+    assert "stray" not in store._collection.rows and stats.chunks_deleted == 1
+
+
+def test_chunk_ids_are_stable_and_distinguish_duplicates():
+    docs = [Document(page_content="x", metadata={"page": 1})] * 2 + [Document(page_content="y")]
+
+    ids = chunk_ids_for(docs)
+
+    assert ids == chunk_ids_for(docs)
+    assert len(set(ids)) == 3 and ids[1] == f"{ids[0]}-1"
+
+
+class FailingLineLoader(LineLoader):
+    """Like ``LineLoader``, but stops without a done marker after the first chunk of ``broken``."""
+
+    def __init__(self, broken: str):
+        super().__init__()
+        self.broken = broken
+
+    def __call__(self, paths: List[Path]):
+        for path, chunks, done in super().__call__(paths):
+            if path.name == self.broken:
+                if not done:
+                    yield path, chunks[:1], False
+                continue
+            yield path, chunks, done
+
+
+def test_file_that_fails_to_load_is_retried_next_run(store, tmp_path):
+    a = write(tmp_path / "a.txt", "mất ngủ")
+    b = write(tmp_path / "b.txt", "lo âu")
+    sync(store, tmp_path, [a, b])
+
+    write(b, "hoảng sợ", "trầm cảm")
+    manifest = IndexManifest(tmp_path / "index.manifest.json", pipeline="v1")
+    stats = sync_documents(store, [a, b], manifest, FailingLineLoader("b.txt"), batch_size=1)
+
+    # The partial write is undone and the old chunks and record are kept
+    assert stats.files_failed == 1 and stats.chunks_added == 0
+    assert store.texts() == sorted(["mất ngủ", "lo âu"])
+
+    stats, loader = sync(store, tmp_path, [a, b])
+    assert loader.loaded == ["b.txt"]
+    assert store.texts() == sorted(["mất ngủ", "hoảng sợ", "trầm cảm"])
+
+
+def test_unreadable_document_is_skipped(tmp_path, monkeypatch):
+    from src.rag.loaders import directory_loader
+    from src.rag.loaders.chunking import ChunkingConfig
+
+    def load(path):
+        if path.name == "broken.txt":
+            raise ValueError("corrupt file")
+        yield Document(page_content=path.read_text(encoding="utf-8"), metadata={"source": str(path), "page": 0})
+
+    monkeypatch.setitem(directory_loader.DOCUMENT_LOADERS, ".txt", load)
+    good = write(tmp_path / "good.txt", "Trầm cảm kéo dài ít nhất hai tuần.")
+    broken = write(tmp_path / "broken.txt", "")
+
+    batches = list(directory_loader.iter_chunk_batches([broken, good], ChunkingConfig(method="recursive"), max_workers=1))
+
+    assert [(path.name, done) for path, _, done in batches] == [("good.txt", False), ("good.txt", True)]
@@ -0,0 +1,38 @@
+"""Vietnamese text normalization."""
+import unicodedata
+
+import pytest
+
+from src.rag.normalize import normalize_text
+
+
+@pytest.mark.parametrize(
+    "old_style, new_style",
+    [
+        ("hòa", "hoà"),  # "oa": tone on the second vowel
+        ("thủy", "thuỷ"),  # "uy"
+        ("khỏe", "khoẻ"),  # "oe"
+        ("lan tỏa", "lan toả"),
+    ],
+)
+def test_tone_moves_to_the_modern_position(old_style, new_style):
+    assert normalize_text(old_style) == new_style
+    assert normalize_text(new_style) == new_style
+
+
+@pytest.mark.parametrize(
+    "word",
+    ["hoàn", "tuyết", "người", "quý", "giữ", "trầm", "cảm", "chuẩn", "Hoà"],
+)
+def test_conventional_spellings_are_unchanged(word):
+    assert normalize_text(word) == word
+
+
+def test_decomposed_input_is_composed():
+    decomposed = unicodedata.normalize("NFD", "Rối loạn lo âu lan toả")
+
+    assert normalize_text(decomposed) == "Rối loạn lo âu lan toả"
+
+
+def test_case_whitespace_and_ascii_are_preserved():
+    assert normalize_text("DSM-5  Tiêu chuẩn\nF41.1") == "DSM-5  Tiêu chuẩn\nF41.1"
@@ -0,0 +1,74 @@
+"""Speculative retrieval reused by the agent's tool calls."""
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from src.rag.retrievers.prefetch import RetrievalPrefetcher
+
+
+class BlockingRetriever:
+    """Embeds and searches the prefetched query only once ``release`` is set."""
+
+    def __init__(self, block_search: bool = False):
+        self.release = asyncio.Event()
+        self.block_search = block_search
+
+    async def aembed_query(self, query):
+        if query == "prefetched" and not self.block_search:
+            await self.release.wait()
+        return [1.0, 0.0]
+
+    async def asearch(self, query, k=None, filter=None):
+        if self.block_search:
+            await self.release.wait()
+        return [Document(page_content=query)]
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize("block_search", [False, True], ids=["vector", "docs"])
+def test_prefetch_cancelled_during_match_is_a_miss(block_search):
+    async def run():
+        prefetcher = RetrievalPrefetcher(BlockingRetriever(block_search))
+        prefetcher.start("prefetched")
+        match = asyncio.ensure_future(prefetcher.match("tool query"))
+        await settle()
+        # E.g. the session ended, or a newer prefetch evicted this one
+        prefetcher.close()
+        return await match, prefetcher.stats()
+
+    docs, stats = asyncio.run(run())
+
+    assert docs is None and stats["misses"] == 1
+
+
+def test_cancelling_the_tool_call_still_propagates():
+    async def run():
+        prefetcher = RetrievalPrefetcher(BlockingRetriever())
+        prefetcher.start("prefetched")
+        match = asyncio.ensure_future(prefetcher.match("tool query"))
+        await settle()
+        match.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await match
+        # The shared prefetch survives the cancelled caller
+        return prefetcher._entries[0].vector.cancelled()
+
+    assert asyncio.run(run()) is False
+
+
+def test_similar_query_reuses_the_prefetch():
+    async def run():
+        retriever = BlockingRetriever()
+        prefetcher = RetrievalPrefetcher(retriever)
+        prefetcher.start("prefetched")
+        match = asyncio.ensure_future(prefetcher.match("tool query"))
+        await settle()
+        retriever.release.set()
+        return await match
+
+    assert [doc.page_content for doc in asyncio.run(run())] == ["prefetched"]
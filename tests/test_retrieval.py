@@ -0,0 +1,121 @@
+"""Query embedding and result selection in the retrieval service."""
+import asyncio
+from typing import List
+
+from src.rag.retrievers.service import RetrievalService
+
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.seen: List[str] = []
+
+    def embed_query(self, text: str) -> List[float]:
+        self.seen.append(text)
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class EmbeddingsOnlyStore:
+    def __init__(self):
+        self.embeddings = RecordingEmbeddings()
+
+
+def make_service():
+    return RetrievalService(EmbeddingsOnlyStore(), batch_window=0)
+
+
+def test_query_is_embedded_as_written_but_cached_by_normalized_key():
+    service = make_service()
+
+    service.embed_query("Rối loạn  Trầm cảm DSM-5")
+    service.embed_query("rối loạn trầm cảm dsm-5")
+
+    assert service.vector_store.embeddings.seen == ["Rối loạn  Trầm cảm DSM-5"]
+
+
+def test_async_embeddings_share_the_cache():
+    service = make_service()
+
+    async def run():
+        await service.aembed_queries(["Mất ngủ", "mất  ngủ", "Lo âu"])
+        return await service.aembed_query("MẤT NGỦ")
+
+    asyncio.run(run())
+    service.executor.shutdown()
+
+    assert service.vector_store.embeddings.seen == ["Mất ngủ", "Lo âu"]
+
+
+def test_batcher_coalesces_concurrent_queries():
+    from src.rag.embeddings.batching import QueryEmbeddingBatcher
+
+    embeddings = RecordingEmbeddings()
+
+    async def run_in_pool(fn, *args):
+        return fn(*args)
+
+    async def run():
+        batcher = QueryEmbeddingBatcher(embeddings, run_in_pool, window=0.01)
+        vectors = await asyncio.gather(*(batcher.aembed(text) for text in ["lo âu", "mất ngủ", "lo âu"]))
+        return batcher, vectors
+
+    batcher, vectors = asyncio.run(run())
+
+    assert vectors[0] == vectors[2] and embeddings.seen == ["lo âu", "mất ngủ"]
+    assert batcher.stats()["batches"] == 1 and not batcher._tasks
+
+
+def test_mmr_skips_near_duplicates():
+    import numpy as np
+
+    from src.rag.retrievers.mmr import maximal_marginal_relevance
+
+    query = [1.0, 0.0, 0.0]
+    candidates = np.array([
+        [0.95, 0.31, 0.0],  # best match
+        [0.94, 0.34, 0.0],  # near-duplicate of the best match
+        [0.80, 0.0, 0.60],  # slightly less relevant, different content
+    ])
+
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+    assert maximal_marginal_relevance(query, candidates, k=5) == [0, 2, 1]
+
+
+class SlowFirstReranker:
+    """Scores by text length; the first pass is slow, like a cold cross-encoder."""
+
+    def __init__(self, first_pass: float):
+        self.first_pass = first_pass
+
+    def score(self, query, passages):
+        import time
+
+        import numpy as np
+
+        time.sleep(self.first_pass)
+        self.first_pass = 0.0
+        return np.asarray([len(passage) for passage in passages], dtype=np.float32)
+
+
+def test_reranking_recovers_after_one_slow_pass():
+    import time
+
+    from langchain_core.documents import Document
+
+    service = RetrievalService(
+        EmbeddingsOnlyStore(), batch_window=0, reranker=SlowFirstReranker(0.4),
+        rerank_budget=0.25, rerank_probe_every=5,
+    )
+    candidates = [Document(page_content="x" * n) for n in (1, 3, 2)]
+
+    for _ in range(20):
+        docs = service._select("q", [1.0, 0.0], candidates, 2, time.perf_counter())
+
+    counts = service.stats()["reranking"]
+    # One slow pass, five skips, then a probe measures the fast model again
+    assert counts["reranked"] == 15 and counts["skipped"] == 5
+    assert [doc.page_content for doc in docs] == ["xxx", "xx"]
+    service.executor.shutdown()
@@ -0,0 +1,73 @@
+"""Indexes persisted next to the vector store."""
+import numpy as np
+import pytest
+
+from src.rag.retrievers.bm25 import BM25Index
+from src.rag.retrievers.flat_index import FlatVectorIndex
+from src.rag.retrievers.storage import atomic_files
+
+
+def test_atomic_files_replace_all_targets(tmp_path):
+    a, b = tmp_path / "x.bin", tmp_path / "x.json"
+    a.write_text("old")
+
+    with atomic_files(a, b) as (a_tmp, b_tmp):
+        a_tmp.write_text("new")
+        b_tmp.write_text("{}")
+        assert a.read_text() == "old" and not b.exists()
+
+    assert a.read_text() == "new" and b.read_text() == "{}"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["x.bin", "x.json"]
+
+
+def test_atomic_files_keep_targets_on_error(tmp_path):
+    a = tmp_path / "x.bin"
+    a.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_files(a) as (a_tmp,):
+            a_tmp.write_text("half")
+            raise RuntimeError("interrupted")
+
+    assert a.read_text() == "old" and [path.name for path in tmp_path.iterdir()] == ["x.bin"]
+
+
+def test_bm25_index_round_trips(tmp_path):
+    index = BM25Index.build(
+        ["a", "b"], ["Rối loạn trầm cảm F32.1", "Rối loạn lo âu lan toả F41.1"], [{"page": 1}, {"page": 2}]
+    )
+    index.save(tmp_path / "kb.bm25")
+
+    loaded = BM25Index.load(tmp_path / "kb.bm25")
+
+    assert BM25Index.exists(tmp_path / "kb.bm25")
+    assert loaded.search("F41.1", k=1) == index.search("F41.1", k=1)
+    assert loaded.search("F41.1", k=1)[0][0] == 1
+
+
+def test_flat_index_save_leaves_mapped_readers_intact(tmp_path):
+    path = tmp_path / "kb.flat"
+    FlatVectorIndex(["a", "b"], ["x", "y"], [{}, {}], np.eye(2, dtype=np.float32)).save(path)
+    reader = FlatVectorIndex.load(path)
+
+    FlatVectorIndex(["c"], ["z"], [{}], np.full((1, 2), 7, dtype=np.float32)).save(path)
+
+    assert reader.ids == ["a", "b"] and reader.matrix.tolist() == [[1, 0], [0, 1]]
+    reloaded = FlatVectorIndex.load(path)
+    assert reloaded.ids == ["c"] and reloaded.matrix.tolist() == [[7, 7]]
+
+
+def test_section_index_round_trips(tmp_path):
+    from src.rag.retrievers.filters import SectionIndex
+
+    index = SectionIndex.build(
+        ["Rối loạn trầm cảm chủ yếu F32.1"],
+        [{"section_id": "s1", "section": "Major Depressive Disorder", "chapter": "Depressive Disorders"}],
+    )
+    index.save(tmp_path / "kb.sections.json")
+
+    loaded = SectionIndex.load(tmp_path / "kb.sections.json")
+
+    assert loaded.sections == index.sections
+    assert loaded.resolve(disorder_code="f32").section_ids == {"s1"}
+    assert [path.name for path in tmp_path.iterdir()] == ["kb.sections.json"]